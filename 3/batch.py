@@ -0,0 +1,169 @@
+"""
+Пакетная трансляция файлов с множеством программ Start ... End.
+
+Запуск: python 3/batch.py ПУТЬ [ПУТЬ ...] [--workers N] [--chunk-size N] [--output ФАЙЛ]
+
+ПУТЬ — файл или каталог (берутся все файлы каталога по порядку имён).
+Программы транслируются в пуле процессов пачками по chunk_size, результаты
+выводятся в исходном порядке по мере готовности в формате JSON Lines.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from lexer import TYPE_CODES, Lexer
+from lineindex import line_index
+from translator import translate
+
+# Количество программ в одной задаче пула
+DEFAULT_CHUNK_SIZE = 64
+
+# Сколько задач на процесс держать в очереди пула
+TASKS_PER_WORKER = 2
+
+START_CODE = TYPE_CODES['KEYWORD_START']
+
+
+def program_starts(text):
+    """
+    Лениво выдаёт смещения токенов Start. Границы берутся у лексера, поэтому
+    "Start" внутри слова (например, "ReStart") программу не начинает.
+    """
+    return (start for code, start, _ in Lexer(text, backend='table').iter_codes() if code == START_CODE)
+
+
+def split_programs(text):
+    """
+    Делит текст на программы и выдаёт пары (смещение, текст программы).
+    Программа начинается токеном Start и продолжается до следующего Start,
+    поэтому лишние символы после End остаются в своей программе и сообщаются
+    как её ошибка. Непустой текст перед первым Start — отдельная программа.
+    """
+    starts = program_starts(text)
+    position = next(starts, len(text))
+    if text[:position].strip():
+        yield 0, text[:position]
+    while position < len(text):
+        next_start = next(starts, len(text))
+        yield position, text[position:next_start]
+        position = next_start
+
+
+def iter_source_files(paths):
+    """Раскрывает каталоги в отсортированные списки файлов."""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                file_path = os.path.join(path, name)
+                if os.path.isfile(file_path):
+                    yield file_path
+        else:
+            yield path
+
+
+def iter_programs(paths):
+    """Выдаёт пары (метаданные программы, текст) для всех программ всех файлов."""
+    for file_path in iter_source_files(paths):
+        with open(file_path, encoding='utf-8') as source:
+            text = source.read()
+        lines = line_index(text)
+        for index, (offset, program) in enumerate(split_programs(text)):
+            line, column = lines.position(offset)
+            yield {'file': file_path, 'program': index, 'offset': offset, 'line': line, 'column': column}, program
+
+
+def translate_program(text):
+    """
+    Транслирует одну программу; возвращает переменные (восьмеричные строки), ошибки
+    и позиции (строка, столбец) их начал внутри программы.
+    """
+    result = translate(text)
+    lines = line_index(text)
+    return {
+        'variables': result.formatted_variables(),
+        'errors': result.errors,
+        'positions': [lines.position(start) for _, start, _ in result.errors],
+    }
+
+
+def _translate_chunk(texts):
+    return [translate_program(text) for text in texts]
+
+
+def _chunks(programs, chunk_size):
+    programs = iter(programs)
+    while True:
+        chunk = list(islice(programs, chunk_size))
+        if not chunk:
+            return
+        yield [meta for meta, _ in chunk], [text for _, text in chunk]
+
+
+def translate_batch(programs, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Транслирует программы (итерируемое пар (метаданные, текст)) в пуле процессов.
+    Выдаёт пары (метаданные, результат) в исходном порядке. Задачи отправляются
+    пачками, в очереди пула одновременно не больше TASKS_PER_WORKER пачек на процесс,
+    поэтому вход читается лениво. При workers == 1 (в том числе по умолчанию на
+    одном ядре) пул не создаётся.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for metas, texts in _chunks(programs, chunk_size):
+            yield from zip(metas, _translate_chunk(texts))
+        return
+
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for metas, texts in _chunks(programs, chunk_size):
+            pending.append((metas, executor.submit(_translate_chunk, texts)))
+            if len(pending) >= workers * TASKS_PER_WORKER:
+                metas, future = pending.popleft()
+                yield from zip(metas, future.result())
+        while pending:
+            metas, future = pending.popleft()
+            yield from zip(metas, future.result())
+
+
+def format_record(meta, result):
+    """
+    Строка JSON Lines; позиции ошибок — абсолютные смещения в файле, а также
+    строка (с 1) и столбец (с 0) начала ошибки в файле.
+    """
+    offset = meta['offset']
+    record = dict(meta)
+    record['ok'] = not result['errors']
+    record['variables'] = result['variables']
+    record['errors'] = []
+    for (message, start, end), (line, column) in zip(result['errors'], result['positions']):
+        # Первая строка программы начинается не с начала строки файла
+        if line == 1:
+            column += meta['column']
+        record['errors'].append({'message': message, 'start': offset + start, 'end': offset + end,
+                                 'line': meta['line'] + line - 1, 'column': column})
+    return json.dumps(record, ensure_ascii=False)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('paths', nargs='+', help='файлы или каталоги с программами')
+    arg_parser.add_argument('--workers', type=int, default=None, help='количество процессов (по умолчанию — число ядер)')
+    arg_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='программ в одной задаче пула')
+    arg_parser.add_argument('--output', help='файл результатов (по умолчанию stdout)')
+    args = arg_parser.parse_args()
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for meta, result in translate_batch(iter_programs(args.paths), args.workers, args.chunk_size):
+            output.write(format_record(meta, result) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Сравнение инкрементального анализа (incremental.py) с полной трансляцией при правке одного числа.
+
+Запуск: python 3/bench_incremental.py [--lines N] [--edits E]
+"""
+import argparse
+import random
+import time
+
+from bench_lexer import generate_program
+from incremental import IncrementalTranslator
+from translator import translate
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=5000, help='количество строк Array')
+    arg_parser.add_argument('--edits', type=int, default=50, help='количество правок')
+    args = arg_parser.parse_args()
+
+    text = generate_program(args.lines)
+    started = time.perf_counter()
+    translate(text)
+    full = time.perf_counter() - started
+
+    engine = IncrementalTranslator(text)
+    rng = random.Random(1)
+    edits = []
+    for _ in range(args.edits):
+        # Заменяем одну восьмеричную цифру другой внутри случайного блока Array
+        offset = rng.randrange(len(text))
+        while text[offset] not in '1234567':
+            offset += 1
+        edits.append((offset, rng.choice('1234567')))
+    started = time.perf_counter()
+    for offset, digit in edits:
+        engine.edit(offset, 1, digit)
+    incremental = (time.perf_counter() - started) / args.edits
+    engine.verify()
+
+    print(f"Полная трансляция:      {full * 1000:.1f} мс")
+    print(f"Инкрементальная правка: {incremental * 1000:.2f} мс ({full / incremental:.0f}x быстрее), "
+          f"режим последней правки: {engine.last_update['mode']}")
+
+
+if __name__ == "__main__":
+    main()
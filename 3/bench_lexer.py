@@ -0,0 +1,68 @@
+"""
+Сравнение бэкендов лексера ('regex' и 'table') на больших входных данных.
+
+Запуск: python 3/bench_lexer.py [--lines N] [--repeat R]
+"""
+import argparse
+import random
+import time
+
+from lexer import LEXER_BACKENDS, Lexer
+
+
+def generate_program(lines, seed=0):
+    """Генерирует программу с большим количеством блоков Array."""
+    rng = random.Random(seed)
+    parts = ["Start"]
+    for _ in range(lines):
+        numbers = []
+        for _ in range(rng.randint(5, 20)):
+            kind = rng.randrange(3)
+            if kind == 0:
+                numbers.append(oct(rng.randrange(1, 10 ** 6))[2:])
+            elif kind == 1:
+                numbers.append(f"{oct(rng.randrange(100))[2:]}.{oct(rng.randrange(1, 512))[2:]}")
+            else:
+                numbers.append(f"{oct(rng.randrange(100))[2:]}.{oct(rng.randrange(8))[2:]},"
+                               f"{oct(rng.randrange(100))[2:]}.{oct(rng.randrange(8))[2:]}")
+        parts.append("Array " + " ".join(numbers))
+    parts.append("lo001 = [5.7**2.4 / 6.4  ] - [5.5 + 3.3 - [2.2 + 0.1]]")
+    parts.append("End")
+    return "\n".join(parts)
+
+
+def bench_backend(text, backend, repeat):
+    """Возвращает лучшее время токенизации, число токенов и результат."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        lexer = Lexer(text, backend=backend)
+        started = time.perf_counter()
+        result = lexer.tokenize_stream()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=20000, help='количество строк Array')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='количество повторов (берётся лучшее)')
+    args = arg_parser.parse_args()
+
+    text = generate_program(args.lines)
+    size_mb = len(text.encode('ascii')) / 2 ** 20
+    print(f"Размер входа: {size_mb:.2f} МБ")
+
+    reference = None
+    for backend in LEXER_BACKENDS:
+        elapsed, (stream, errors) = bench_backend(text, backend, args.repeat)
+        signature = (bytes(stream.types), stream.starts.tobytes(), stream.ends.tobytes(), errors)
+        if reference is None:
+            reference = signature
+        elif signature != reference:
+            raise SystemExit(f"Бэкенд '{backend}' дал результат, отличный от '{LEXER_BACKENDS[0]}'")
+        print(f"{backend:>6}: {elapsed:.3f} с, {len(stream) / elapsed:,.0f} токенов/с, {size_mb / elapsed:.2f} МБ/с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Сравнение загрузки двоичного снимка (snapshot.py) с полным лексическим и синтаксическим анализом.
+
+Запуск: python 3/bench_snapshot.py [--lines N] [--repeat R]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from bench_lexer import generate_program
+from lexer import Lexer
+from snapshot import build_snapshot, load_file, save
+
+
+def best_time(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=20000, help='количество строк Array')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='количество повторов (берётся лучшее)')
+    args = arg_parser.parse_args()
+
+    text = generate_program(args.lines)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.snap')
+        save(build_snapshot(text), text, path)
+        size_mb = os.path.getsize(path) / 2 ** 20
+
+        tokenize = best_time(lambda: Lexer(text).tokenize_stream(), args.repeat)
+        full = best_time(lambda: build_snapshot(text), args.repeat)
+        load = best_time(lambda: load_file(path, text), args.repeat)
+
+    print(f"Размер снимка: {size_mb:.2f} МБ")
+    print(f"Lexer.tokenize_stream:      {tokenize:.3f} с")
+    print(f"Лексический + синт. анализ: {full:.3f} с")
+    print(f"Загрузка снимка:            {load:.3f} с ({full / load:.0f}x быстрее анализа)")
+
+
+if __name__ == "__main__":
+    main()
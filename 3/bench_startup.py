@@ -0,0 +1,47 @@
+"""
+Время холодного старта: запуск интерпретатора, импорт и трансляция одной программы.
+
+Запуск: python 3/bench_startup.py [--repeat R]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROGRAM = "Start\nArray 4 5.7 5 6.4,0.1\nlo001 = [5.7**2.4 / 6.4  ] - [5.5 + 3.3 - [2.2 + 0.1]]\nEnd\n"
+
+
+def measure(command, repeat):
+    """Медиана времени выполнения команды в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--repeat', type=int, default=20, help='количество запусков (берётся медиана)')
+    args = arg_parser.parse_args()
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as source:
+        source.write(PROGRAM)
+    try:
+        interpreter = measure([sys.executable, '-c', 'pass'], args.repeat)
+        translator = measure([sys.executable, os.path.join(SCRIPT_DIR, 'translator.py'), source.name], args.repeat)
+    finally:
+        os.unlink(source.name)
+
+    print(f"Пустой интерпретатор:  {interpreter:.1f} мс")
+    print(f"translator.py:         {translator:.1f} мс (+{translator - interpreter:.1f} мс)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Набор бенчмарков: время лексера, парсера и format_value на синтетических программах разного размера.
+
+Запуск: python 3/bench_suite.py [--sizes 125,500,2000] [--scenarios arrays,rows,...]
+                                [--repeat R] [--seed S] [--output РЕЗУЛЬТАТ.json]
+                                [--compare БАЗА.json] [--threshold 0.1]
+
+Программы строит progen.py с заданным зерном, поэтому входы одинаковы от запуска
+к запуску. Для каждого сценария и размера измеряются отдельно фазы:
+  lex    — Lexer.tokenize_stream
+  parse  — Parser.parse по готовому TokenStream (в сценарии invalid — с восстановлением после ошибок)
+  format — format_value для всех чисел блоков Множ и переменных
+Время — лучшее из --repeat повторов; пиковая память фазы измеряется tracemalloc
+в отдельном прогоне, чтобы не искажать время. Показатель масштабирования —
+наклон log(время)/log(размер входа) между соседними размерами (1.0 — линейно).
+С --compare фазы, ставшие медленнее базы больше чем на --threshold, считаются
+регрессией, и код возврата равен 1.
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import octal
+import progen
+from lexer import Lexer
+from parser import Parser, format_value
+
+DEFAULT_SIZES = (125, 500, 2000)
+
+# Сценарий: размер -> параметры генератора; size задаёт масштаб входа
+SCENARIOS = {
+    'arrays': lambda rng, size: progen.generate_valid(rng, blocks=size, row_length=10),
+    'rows': lambda rng, size: progen.generate_valid(rng, blocks=1, row_length=10 * size),
+    'complex': lambda rng, size: progen.generate_valid(rng, blocks=size, row_length=10, complex_share=1.0),
+    'expression': lambda rng, size: progen.generate_valid(rng, blocks=1, row_length=1, terms=size, bracket_share=0.1),
+    'nesting': lambda rng, size: progen.generate_valid(rng, blocks=1, row_length=1, terms=size, bracket_share=0.9),
+    'invalid': lambda rng, size: progen.generate_invalid(rng, errors=max(1, size // 10), blocks=size, row_length=10),
+}
+
+PHASES = ('lex', 'parse', 'format')
+
+
+def best_time(function, repeat, setup=None):
+    best = float('inf')
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def peak_memory(function, setup=None):
+    """Пиковый прирост выделенной памяти при вызове function, КиБ."""
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def run_case(scenario, size, seed, repeat):
+    """Измеряет все фазы для одной программы; возвращает запись результата."""
+    text = SCENARIOS[scenario](random.Random(seed), size)
+    size_mb = len(text.encode('utf-8')) / 2 ** 20
+    recover = scenario == 'invalid'
+
+    tokens, _ = Lexer(text).tokenize_stream()
+    parser = Parser(tokens, text, recover=recover)
+    symbol_table, errors = parser.parse()
+    values = [value for block in parser.arrays for value in block.values()]
+    values.extend(symbol_table.values())
+
+    def lex():
+        Lexer(text).tokenize_stream()
+
+    def parse():
+        Parser(tokens, text, recover=recover).parse()
+
+    def format_all():
+        for value in values:
+            format_value(value)
+
+    # Кэш octal.encode очищается, чтобы format измерял преобразование, а не поиск в кэше
+    phases = {}
+    for name, function, setup, items in (
+        ('lex', lex, None, len(tokens)),
+        ('parse', parse, None, len(tokens)),
+        ('format', format_all, octal.encode.cache_clear, len(values)),
+    ):
+        seconds = best_time(function, repeat, setup)
+        phase = {
+            'seconds': seconds,
+            'peak_kib': peak_memory(function, setup),
+        }
+        if name == 'format':
+            phase['values_per_s'] = items / seconds if seconds else None
+        else:
+            phase['tokens_per_s'] = items / seconds if seconds else None
+            phase['mb_per_s'] = size_mb / seconds if seconds else None
+        phases[name] = phase
+
+    return {
+        'scenario': scenario,
+        'size': size,
+        'bytes': len(text.encode('utf-8')),
+        'tokens': len(tokens),
+        'values': len(values),
+        'errors': len(errors),
+        'phases': phases,
+    }
+
+
+def scaling(records):
+    """Наклоны log(время)/log(байты) между соседними размерами одного сценария и фазы."""
+    slopes = {}
+    for previous, current in zip(records, records[1:]):
+        for phase in PHASES:
+            before = previous['phases'][phase]['seconds']
+            after = current['phases'][phase]['seconds']
+            if before > 0 and after > 0 and current['bytes'] != previous['bytes']:
+                slope = math.log(after / before) / math.log(current['bytes'] / previous['bytes'])
+                slopes.setdefault(phase, []).append(round(slope, 2))
+    return slopes
+
+
+def print_records(records):
+    print(f"{'сценарий':<11}{'размер':>7}{'КиБ':>9}{'токены':>9}  "
+          f"{'lex, мс':>9}{'ток/с':>12}{'МБ/с':>7}  {'parse, мс':>10}{'ток/с':>12}  "
+          f"{'format, мс':>11}{'пик parse, КиБ':>16}")
+    for record in records:
+        lex, parse, fmt = (record['phases'][phase] for phase in PHASES)
+        print(f"{record['scenario']:<11}{record['size']:>7}{record['bytes'] / 1024:>9.1f}{record['tokens']:>9}  "
+              f"{lex['seconds'] * 1000:>9.2f}{lex['tokens_per_s']:>12,.0f}{lex['mb_per_s']:>7.2f}  "
+              f"{parse['seconds'] * 1000:>10.2f}{parse['tokens_per_s']:>12,.0f}  "
+              f"{fmt['seconds'] * 1000:>11.2f}{parse['peak_kib']:>16.0f}")
+
+
+def compare(results, baseline, threshold):
+    """Печатает отношение времени к базе; возвращает количество регрессий."""
+    base = {(record['scenario'], record['size']): record for record in baseline['results']}
+    regressions = 0
+    for record in results['results']:
+        reference = base.get((record['scenario'], record['size']))
+        if reference is None:
+            continue
+        for phase in PHASES:
+            before = reference['phases'][phase]['seconds']
+            after = record['phases'][phase]['seconds']
+            if not before:
+                continue
+            ratio = after / before
+            marker = ''
+            if ratio > 1 + threshold:
+                marker = '  <-- регрессия'
+                regressions += 1
+            print(f"{record['scenario']:<11}{record['size']:>7} {phase:<7}{ratio:>7.2f}x{marker}")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='размеры через запятую')
+    arg_parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='сценарии через запятую')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='количество повторов (берётся лучшее)')
+    arg_parser.add_argument('--seed', type=int, default=0, help='зерно генератора программ')
+    arg_parser.add_argument('--output', help='файл для результатов в JSON')
+    arg_parser.add_argument('--compare', help='JSON прошлого запуска для сравнения')
+    arg_parser.add_argument('--threshold', type=float, default=0.1, help='допустимое замедление относительно базы')
+    args = arg_parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    scenarios = args.scenarios.split(',')
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        arg_parser.error(f"неизвестные сценарии: {', '.join(unknown)}; допустимы: {', '.join(SCENARIOS)}")
+
+    records = []
+    for scenario in scenarios:
+        records.extend(run_case(scenario, size, args.seed, args.repeat) for size in sizes)
+    print_records(records)
+
+    print("\nМасштабирование (наклон log t / log размера, 1.0 — линейно):")
+    curves = {}
+    for scenario in scenarios:
+        curves[scenario] = scaling([record for record in records if record['scenario'] == scenario])
+        print(f"{scenario:<11}" + "  ".join(f"{phase} {curves[scenario].get(phase, [])}" for phase in PHASES))
+
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'sizes': sizes,
+        },
+        'results': records,
+        'scaling': curves,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(results, output, ensure_ascii=False, indent=1)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as base_file:
+            baseline = json.load(base_file)
+        print(f"\nСравнение с {args.compare} (порог {args.threshold:.0%}):")
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
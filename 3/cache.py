@@ -0,0 +1,189 @@
+"""
+Кэш результатов трансляции с адресацией по содержимому.
+
+Ключ — SHA-256 от версии транслятора, проходов оптимизатора, режима
+восстановления после ошибок и нормализованного текста программы. Версия транслятора — хэш исходников его модулей, поэтому
+любое изменение кода делает старые записи недостижимыми.
+
+Два уровня:
+- в памяти — LRU на max_entries записей;
+- на диске (необязательный) — по файлу JSON на запись. Запись идёт во временный
+  файл с атомарной заменой (os.replace), поэтому каталог можно разделять между
+  процессами; повреждённая или недописанная запись считается промахом.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from translator import TranslationResult, translate
+
+DEFAULT_MAX_ENTRIES = 1024
+
+# Модули, от которых зависит результат трансляции
+TRANSLATOR_MODULES = ('lexer', 'parser', 'expr', 'octal', 'symbols', 'columns', 'optimizer', 'translator')
+
+# Завершающие символы, которые лексер никогда не включает в токен или ошибку
+TRAILING_WHITESPACE = ' \t\r\n'
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@lru_cache(maxsize=None)
+def translator_version():
+    """Хэш исходных текстов модулей транслятора."""
+    digest = hashlib.sha256()
+    for module in TRANSLATOR_MODULES:
+        with open(os.path.join(SCRIPT_DIR, module + '.py'), 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def normalize_source(text):
+    """
+    Нормализует текст для ключа кэша. Отбрасываются только завершающие пробелы,
+    табуляции и переводы строк: они не влияют ни на результат, ни на позиции ошибок.
+    """
+    return text.rstrip(TRAILING_WHITESPACE)
+
+
+def cache_key(text, optimize_passes=(), recover=False):
+    digest = hashlib.sha256()
+    digest.update(translator_version().encode('ascii'))
+    digest.update(('\0' + ','.join(optimize_passes) + ('\0recover' if recover else '') + '\0').encode('utf-8'))
+    digest.update(normalize_source(text).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _encode_value(value):
+    if isinstance(value, complex):
+        return {'complex': [value.real, value.imag]}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return complex(*value['complex'])
+    return value
+
+
+def dump_result(result):
+    """Сериализует TranslationResult в JSON (значения хранятся точно)."""
+    return json.dumps({
+        'variables': {name: _encode_value(value) for name, value in result.variables.items()},
+        'errors': result.errors,
+        'stage': result.stage,
+    }, ensure_ascii=False)
+
+
+def load_result(data):
+    record = json.loads(data)
+    variables = {name: _decode_value(value) for name, value in record['variables'].items()}
+    errors = [tuple(error) for error in record['errors']]
+    return TranslationResult(variables, errors, record['stage'])
+
+
+def _copy(result):
+    return TranslationResult(dict(result.variables), list(result.errors), result.stage)
+
+
+class TranslationCache:
+    """
+    Кэш TranslationResult. Счётчики: memory_hits, disk_hits, misses, evictions
+    (вытеснения из памяти). directory=None отключает дисковый уровень.
+    """
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def translate(self, text, optimize_passes=(), recover=False):
+        """Возвращает результат из кэша или транслирует и сохраняет его."""
+        optimize_passes = tuple(optimize_passes)
+        key = cache_key(text, optimize_passes, recover)
+        result = self.get(key)
+        if result is None:
+            result = translate(text, optimize_passes, recover)
+            self.put(key, result)
+        return _copy(result)
+
+    def get(self, key):
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                return result
+        result = self._read_disk(key)
+        with self.lock:
+            if result is not None:
+                self.disk_hits += 1
+                self._remember(key, result)
+            else:
+                self.misses += 1
+        return result
+
+    def put(self, key, result):
+        with self.lock:
+            self._remember(key, result)
+        self._write_disk(key, result)
+
+    def _remember(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def _read_disk(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), encoding='utf-8') as entry:
+                return load_result(entry.read())
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_disk(self, key, result):
+        if self.directory is None:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as entry:
+                entry.write(dump_result(result))
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def clear(self):
+        """Очищает уровень в памяти (дисковые записи остаются)."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,87 @@
+"""
+Проверка инкрементального анализа (incremental.py) случайными правками.
+
+Запуск: python 3/check_incremental.py [--programs N] [--edits E] [--seed S]
+
+Для корректных и ошибочных программ генератора (progen.py) и набора
+программ с особой структурой выполняются случайные правки: замены цифр,
+вставки и удаления токенов. После каждой правки IncrementalTranslator.verify()
+сверяет результат с полной трансляцией. Код возврата 1 при расхождениях.
+"""
+import argparse
+import random
+import re
+import sys
+from collections import Counter
+
+import progen
+from incremental import IncrementalTranslator, VerificationError
+
+# Программы, на которых ошибались прошлые версии инкрементального разбора
+REGRESSION_PROGRAMS = (
+    # Ошибка в первом блоке: правка во втором блоке не должна продолжать разбор с него
+    "Start\nArray 1 End 2\nArray 3 4\nlo001 = 1.0\nEnd",
+    "Start\nArray 1 2.3 4.5,6.7\nArray 7\nlo001 = [1.0 + 2.0] * 3.0\nEnd",
+    "Start\nArray 1 8\nArray 2\nArray 3\nlo001 = 1.0\nEnd",
+    "Start\nArray 1\nArray 2 3.\nlo001 = 1.0 / 2.0\nEnd",
+    "Start\nArray 1\nlo001 = 1.0 +\nEnd",
+)
+
+# Вставляемые фрагменты: числа, операторы, ключевые слова и пробелы
+PIECES = ("1", "7", "0", "8", " ", "\n", ".", ",", "2.3", "1.2,3.4", " 5.6 ", "lo001", "ab",
+          "+", "-", "*", "/", "**", "[", "]", "=", "Array", "End")
+DIGIT_REPLACEMENTS = ("3", "0", "8", " 5", "4.1", " 2.2,3.3", "")
+
+
+def random_edit(rng, text):
+    """Правка (смещение, длина удалённого, вставленный текст); чаще всего — замена цифры."""
+    digits = [match.start() for match in re.finditer('[0-7]', text)]
+    if digits and rng.random() < 0.6:
+        return rng.choice(digits), rng.choice((0, 1)), rng.choice(DIGIT_REPLACEMENTS)
+    offset = rng.randint(0, len(text))
+    removed = min(rng.choice((0, 0, 1, 1, 2, 3)), len(text) - offset)
+    inserted = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 2)))
+    return offset, removed, inserted
+
+
+def programs(rng, count):
+    yield from REGRESSION_PROGRAMS
+    for index in range(count):
+        options = dict(blocks=rng.randint(1, 4), row_length=rng.randint(1, 4), terms=rng.randint(1, 5))
+        if index % 2:
+            yield progen.generate_invalid(rng, errors=rng.randint(1, 2), **options)
+        else:
+            yield progen.generate_valid(rng, **options)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--programs', type=int, default=200, help='количество сгенерированных программ')
+    arg_parser.add_argument('--edits', type=int, default=25, help='правок на программу')
+    arg_parser.add_argument('--seed', type=int, default=1, help='зерно генератора')
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    modes = Counter()
+    failures = 0
+    for text in programs(rng, args.programs):
+        engine = IncrementalTranslator(text)
+        for _ in range(args.edits):
+            before = engine.text
+            edit = random_edit(rng, before)
+            try:
+                engine.edit(*edit, verify=True)
+            except VerificationError as error:
+                failures += 1
+                print(f"{before!r} {edit!r}: {error}", file=sys.stderr)
+                engine = IncrementalTranslator(engine.text)
+            modes[engine.last_update['mode']] += 1
+
+    total = sum(modes.values())
+    print(f"Правок: {total}, расхождений: {failures}; режимы: "
+          + ", ".join(f"{mode} {count}" for mode, count in modes.most_common()))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Колоночное хранение чисел блоков Множ (Array).
+
+Каждый блок хранится как типизированные непрерывные колонки array('d'):
+reals — цел и вещ (float64), complexes — компл парами (re, im) подряд,
+т. е. в раскладке complex128. Во время разбора блок запоминает только тип
+и позиции чисел в исходном тексте; колонки заполняются одним пакетным
+декодированием (octal.decode_many) при первом обращении к ним.
+Если установлен NumPy, as_numpy() отдаёт их как float64/complex128 без
+копирования; сам NumPy импортируется только при первом таком обращении.
+"""
+from array import array
+
+import octal
+from lexer import token_text
+
+KIND_INT = 0
+KIND_REAL = 1
+KIND_COMPLEX = 2
+
+_numpy = False  # ещё не загружался
+
+
+def get_numpy():
+    """Импортирует NumPy при первом обращении; None, если NumPy не установлен."""
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:  # NumPy не обязателен
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+class ArrayBlock:
+    """
+    Числа одного блока Множ в колонках; kinds хранит исходный порядок и тип чисел.
+    Блок, построенный from_source, декодирует колонки при первом обращении.
+    """
+    __slots__ = ('start', 'end', 'kinds', '_reals', '_complexes', '_source')
+
+    def __init__(self, start, end, kinds, reals, complexes):
+        self.start = start
+        self.end = end
+        self.kinds = kinds
+        self._reals = reals
+        self._complexes = complexes
+        self._source = None
+
+    @classmethod
+    def from_source(cls, start, end, kinds, number_starts, number_ends, text, literals=None):
+        """
+        Блок по позициям чисел в text; literals — записи чисел, токены которых
+        в тексте разделены (индекс числа -> запись). Текст остаётся у блока до
+        декодирования, поэтому отображение в память (lexer.map_source_file)
+        нельзя закрывать раньше первого обращения к колонкам.
+        """
+        block = cls(start, end, kinds, None, None)
+        block._source = (text, number_starts, number_ends, literals or {})
+        return block
+
+    def _decode(self):
+        text, number_starts, number_ends, literals = self._source
+        real_literals = []
+        complex_literals = []
+        for index, (kind, start, end) in enumerate(zip(self.kinds, number_starts, number_ends)):
+            literal = literals.get(index) or token_text(text, start, end)
+            if kind == KIND_COMPLEX:
+                complex_literals.extend(literal.split(','))
+            else:
+                real_literals.append(literal)
+        self._reals = octal.decode_many(real_literals)
+        self._complexes = octal.decode_many(complex_literals)
+        self._source = None
+
+    @property
+    def reals(self):
+        if self._source is not None:
+            self._decode()
+        return self._reals
+
+    @property
+    def complexes(self):
+        if self._source is not None:
+            self._decode()
+        return self._complexes
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def complex_count(self):
+        return len(self.complexes) // 2
+
+    def complex_at(self, index):
+        return complex(self.complexes[2 * index], self.complexes[2 * index + 1])
+
+    def values(self):
+        """Выдаёт числа блока в исходном порядке (float или complex)."""
+        real_index = complex_index = 0
+        for kind in self.kinds:
+            if kind == KIND_COMPLEX:
+                yield self.complex_at(complex_index)
+                complex_index += 1
+            else:
+                yield self.reals[real_index]
+                real_index += 1
+
+    def as_numpy(self):
+        """Колонки как массивы NumPy (float64, complex128) без копирования; None без NumPy."""
+        numpy = get_numpy()
+        if numpy is None:
+            return None
+        return (numpy.frombuffer(self.reals, dtype=numpy.float64),
+                numpy.frombuffer(self.complexes, dtype=numpy.complex128))
+
+    def vector(self):
+        """
+        Все числа блока одним вектором в исходном порядке. С NumPy — float64
+        (complex128, если есть компл), без NumPy — колонка reals или список Python.
+        """
+        numpy = get_numpy()
+        if numpy is None:
+            return self.reals if not self.complex_count else list(self.values())
+        reals, complexes = self.as_numpy()
+        if not self.complex_count:
+            return reals
+        is_complex = numpy.frombuffer(self.kinds, dtype=numpy.uint8) == KIND_COMPLEX
+        result = numpy.empty(len(self), dtype=numpy.complex128)
+        result[is_complex] = complexes
+        result[~is_complex] = reals
+        return result
+
+    def summary(self):
+        """Краткая статистика по колонкам без материализации списков Python."""
+        result = {
+            'count': len(self),
+            'real_count': len(self.reals),
+            'complex_count': self.complex_count,
+        }
+        numpy = get_numpy()
+        if len(self.reals):
+            if numpy is not None:
+                reals = numpy.frombuffer(self.reals, dtype=numpy.float64)
+                total = float(reals.sum())
+                result.update(min=float(reals.min()), max=float(reals.max()))
+            else:
+                total = sum(self.reals)
+                result.update(min=min(self.reals), max=max(self.reals))
+            result.update(sum=total, mean=total / len(self.reals))
+        if self.complex_count:
+            if numpy is not None:
+                result['complex_mean'] = complex(numpy.frombuffer(self.complexes, dtype=numpy.complex128).mean())
+            else:
+                count = self.complex_count
+                result['complex_mean'] = complex(sum(self.complexes[0::2]) / count, sum(self.complexes[1::2]) / count)
+        return result
+
+    def __repr__(self):
+        return f"ArrayBlock({len(self)} чисел, pos {self.start}-{self.end})"
+
+
+class ArrayBlockBuilder:
+    """Запоминает тип и позиции (начало, конец) чисел блока во время разбора."""
+    __slots__ = ('start', 'text', 'kinds', 'starts', 'ends', 'literals')
+
+    def __init__(self, start, text):
+        self.start = start
+        self.text = text
+        self.kinds = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.literals = {}
+
+    def add(self, kind, start, end):
+        """Число, записанное в text без разрывов с start по end."""
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def add_parts(self, kind, parts):
+        """
+        Число из токенов parts (тип, начало, конец). Между токенами могут стоять
+        пробелы и пропущенные лексером символы — тогда запись собирается сразу.
+        """
+        if any(left[2] != right[1] for left, right in zip(parts, parts[1:])):
+            self.literals[len(self.kinds)] = ''.join(token_text(self.text, part[1], part[2]) for part in parts)
+        self.add(kind, parts[0][1], parts[-1][2])
+
+    def build(self, end):
+        return ArrayBlock.from_source(self.start, end, self.kinds, self.starts, self.ends, self.text, self.literals)
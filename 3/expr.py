@@ -0,0 +1,176 @@
+"""
+Дерево выражения блока Окончание и его компиляция в линейную программу.
+
+Парсер строит дерево один раз, после чего скомпилированное выражение
+можно вычислять многократно без токенов и состояния парсера.
+"""
+import operator
+
+
+class EvaluationError(Exception):
+    """Ошибка времени вычисления с позицией в исходном тексте."""
+    def __init__(self, message, start, end):
+        super().__init__(message)
+        self.message = message
+        self.start = start
+        self.end = end
+
+
+class Num:
+    """Числовой литерал (вещ)."""
+    __slots__ = ('value', 'start', 'end')
+
+    def __init__(self, value, start, end):
+        self.value = value
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"Num({self.value!r})"
+
+
+class Var:
+    """Ссылка на переменную; slot — номер слота в таблице символов."""
+    __slots__ = ('name', 'start', 'end', 'slot')
+
+    def __init__(self, name, start, end, slot):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.slot = slot
+
+    def __repr__(self):
+        return f"Var({self.name})"
+
+
+class Neg:
+    """Унарный минус перед блоком3."""
+    __slots__ = ('operand', 'start', 'end')
+
+    def __init__(self, operand, start, end):
+        self.operand = operand
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"Neg({self.operand!r})"
+
+
+class BinOp:
+    """
+    Бинарная операция: '+', '-', '*', '/' или '**'.
+    op_start — позиция оператора; ошибка деления на ноль указывает на
+    диапазон от оператора до конца правого операнда (op_start..end).
+    """
+    __slots__ = ('op', 'left', 'right', 'start', 'end', 'op_start')
+
+    def __init__(self, op, left, right, start, end, op_start):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.start = start
+        self.end = end
+        self.op_start = op_start
+
+    def __repr__(self):
+        return f"BinOp({self.op!r}, {self.left!r}, {self.right!r})"
+
+
+def iter_nodes(node):
+    """Обходит дерево в прямом порядке."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, BinOp):
+            stack.append(node.right)
+            stack.append(node.left)
+        elif isinstance(node, Neg):
+            stack.append(node.operand)
+
+
+def postorder(root):
+    """
+    Обходит дерево (или DAG) без рекурсии: потомки выдаются раньше родителя,
+    левый раньше правого, общий узел — один раз, при первом вхождении.
+    """
+    visited = set()
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            yield node
+            continue
+        if id(node) in visited:
+            continue
+        visited.add(id(node))
+        stack.append((node, True))
+        if isinstance(node, BinOp):
+            stack.append((node.right, False))
+            stack.append((node.left, False))
+        elif isinstance(node, Neg):
+            stack.append((node.operand, False))
+
+
+_OPERATIONS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '**': operator.pow,
+}
+
+
+def _negate(operand, _):
+    return -operand
+
+
+def _divider(op_start, end):
+    def divide(dividend, divisor):
+        if divisor == 0:
+            raise EvaluationError('Ошибка: деление на ноль', op_start, end)
+        return dividend / divisor
+    return divide
+
+
+def compile_expression(node):
+    """
+    Компилирует дерево в линейную программу регистровой машины.
+    Возвращает функцию f(env), где env — список значений переменных по слотам
+    (SymbolTable.values).
+    Деление на ноль вызывает EvaluationError с позицией из дерева.
+
+    Каждому узлу соответствует регистр, операции выполняются в порядке postorder,
+    поэтому глубина дерева не ограничена пределом рекурсии. Узел DAG (после
+    устранения общих подвыражений) вычисляется один раз, при первом вхождении
+    слева направо.
+    """
+    registers = {}
+    template = []
+    loads = []
+    code = []
+    for index, item in enumerate(postorder(node)):
+        registers[id(item)] = index
+        if isinstance(item, Num):
+            template.append(item.value)
+            continue
+        template.append(None)
+        if isinstance(item, Var):
+            loads.append((index, item.slot))
+        elif isinstance(item, Neg):
+            code.append((index, _negate, registers[id(item.operand)], 0))
+        elif item.op == '/':
+            code.append((index, _divider(item.op_start, item.end), registers[id(item.left)], registers[id(item.right)]))
+        elif item.op in _OPERATIONS:
+            code.append((index, _OPERATIONS[item.op], registers[id(item.left)], registers[id(item.right)]))
+        else:
+            raise ValueError(f"Неизвестный оператор '{item.op}'")
+    result = len(template) - 1
+
+    def run(env):
+        values = template[:]
+        for index, slot in loads:
+            values[index] = env[slot]
+        for index, operation, left, right in code:
+            values[index] = operation(values[left], values[right])
+        return values[result]
+    return run
@@ -1,12 +1,109 @@
+import queue
+import threading
 import tkinter as tk
-from parser import Parser, format_value
+from parser import format_value
 from tkinter import scrolledtext
 
-from lexer import Lexer
+from cache import TranslationCache, cache_key
+from incremental import IncrementalTranslator
+from lexer import TOKEN_TYPES, Lexer
+from lineindex import LineIndex, line_index
+
+# Период опроса готовых результатов фонового потока, мс
+POLL_INTERVAL_MS = 15
+# Пауза после последнего нажатия клавиши перед трансляцией в живом режиме, мс
+LIVE_DELAY_MS = 300
+# Строк вывода на одной странице; более длинный вывод листается постранично
+OUTPUT_PAGE_SIZE = 500
+# Диапазонов подсветки в одном вызове tag_add
+HIGHLIGHT_BATCH = 1000
+# Строк выше и ниже видимой области, которые тоже раскрашиваются
+SYNTAX_MARGIN_LINES = 20
+
+# Раскраска поля ввода по классам токенов
+SYNTAX_COLORS = {
+    'keyword': 'blue',
+    'identifier': 'dark green',
+    'number': 'dark orange',
+    'operator': 'purple',
+    'invalid': 'red',
+}
+
+
+def _syntax_tag(token_type):
+    if token_type.startswith('KEYWORD_'):
+        return 'keyword'
+    if token_type == 'IDENTIFIER':
+        return 'identifier'
+    if token_type in ('NUMBER', 'PUNCTUATION_DOT', 'PUNCTUATION_COMMA'):
+        return 'number'
+    if token_type.startswith('INVALID_'):
+        return 'invalid'
+    return 'operator'
+
+
+# Тег подсветки по коду типа токена
+SYNTAX_TAGS = tuple(_syntax_tag(token_type) for token_type in TOKEN_TYPES)
+
+
+def format_result_lines(result):
+    """Строки вывода для результата трансляции (или исключения фонового потока)."""
+    if isinstance(result, Exception):
+        return [f"Внутренняя ошибка транслятора: {result}"]
+
+    if not result.ok:
+        if result.stage == 'lexer':
+            lines = ["Обнаружены ошибки лексического анализа:"]
+        elif len(result.errors) > 1:
+            lines = ["Обнаружены синтаксические ошибки:"]
+        else:
+            lines = ["Обнаружена синтаксическая ошибка:"]
+        lines.extend(f"- {msg}" for msg, start, end in result.errors)
+        return lines
+
+    lines = ["Трансляция успешно завершена.", "\nРезультат вычислений (восьмеричные значения):"]
+    if result.variables:
+        lines.extend(f"{var} = {format_value(value)}" for var, value in result.variables.items())
+    else:
+        lines.append("Переменные не были объявлены.")
+    return lines
+
+
+class TranslationWorker:
+    """
+    Фоновый поток трансляции. Хранится только последний запрос: если за время
+    работы пришло несколько новых, выполняется самый свежий, остальные
+    отбрасываются. Результаты (номер запроса, результат или исключение)
+    складываются в очередь results, которую опрашивает главный поток.
+    """
+    def __init__(self, translate):
+        self._translate = translate
+        self._pending = None
+        self._condition = threading.Condition()
+        self.results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='translation-worker', daemon=True)
+        self._thread.start()
+
+    def submit(self, generation, *args):
+        with self._condition:
+            self._pending = (generation, args)
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None)
+                generation, args = self._pending
+                self._pending = None
+            try:
+                result = self._translate(*args)
+            except Exception as error:
+                result = error
+            self.results.put((generation, result))
 
 
 class TranslatorGUI:
-    def __init__(self, master):
+    def __init__(self, master, live_delay_ms=LIVE_DELAY_MS):
         self.master = master
         master.title("BNF Translator")
         master.grid_columnconfigure(0, weight=1)
@@ -57,74 +154,258 @@ class TranslatorGUI:
         self.output_text = scrolledtext.ScrolledText(self.output_frame, wrap=tk.WORD, height=10, font=('Courier New', 10), state=tk.DISABLED)
         self.output_text.pack(fill='both', expand=True)
 
+        # Постраничный просмотр длинного вывода: в виджет вставляется только текущая страница
+        self.output_lines = []
+        self.output_page = 0
+        self.pager_frame = tk.Frame(self.output_frame)
+        self.prev_page_button = tk.Button(self.pager_frame, text="<", command=lambda: self.show_page(self.output_page - 1))
+        self.prev_page_button.pack(side=tk.LEFT)
+        self.page_label = tk.Label(self.pager_frame)
+        self.page_label.pack(side=tk.LEFT, padx=5)
+        self.next_page_button = tk.Button(self.pager_frame, text=">", command=lambda: self.show_page(self.output_page + 1))
+        self.next_page_button.pack(side=tk.LEFT)
+
         # Кнопка трансляции
         self.translate_button = tk.Button(master, text="Транслировать", command=self.translate)
         self.translate_button.grid(row=2, column=0, columnspan=2, pady=5)
 
+        # Живой режим: трансляция после паузы в наборе текста
+        self.live_mode = tk.BooleanVar(value=False)
+        self.live_check = tk.Checkbutton(master, text="Транслировать при вводе", variable=self.live_mode, command=self.on_live_toggle)
+        self.live_check.grid(row=3, column=0)
+
+        # Сбор всех синтаксических ошибок за один проход вместо остановки на первой
+        self.all_errors = tk.BooleanVar(value=False)
+        self.all_errors_check = tk.Checkbutton(master, text="Показывать все ошибки", variable=self.all_errors, command=self.on_all_errors_toggle)
+        self.all_errors_check.grid(row=3, column=1)
+
+        # Время фаз и счётчики трансляции (profiling); скрыты, пока флажок снят
+        self.show_stats = tk.BooleanVar(value=False)
+        self.stats_check = tk.Checkbutton(master, text="Показывать время фаз", variable=self.show_stats, command=self.on_stats_toggle)
+        self.stats_check.grid(row=4, column=0, columnspan=2)
+        self.stats_label = tk.Label(master, justify=tk.LEFT, anchor='w', font=('Courier New', 9))
+        self.live_delay_ms = live_delay_ms
+        self.live_job = None
+        self.input_text.bind("<<Modified>>", self.on_input_modified)
+
         self.input_text.tag_configure("error", background="salmon")
 
+        # Подсветка синтаксиса только видимых строк; обновляется при прокрутке и правке
+        for tag, color in SYNTAX_COLORS.items():
+            self.input_text.tag_configure(tag, foreground=color)
+        self.input_text.tag_raise("error")
+        self.syntax_job = None
+        self.input_text.config(yscrollcommand=self.on_input_scroll)
+        self.input_text.bind("<Configure>", lambda event: self.schedule_syntax_highlight())
+
+        # Повторная трансляция того же текста берёт результат из кэша
+        self.cache = TranslationCache()
+        # Между запусками перетранслируется только изменённая часть программы
+        self.engine = None
+
+        # Анализ выполняется в фоновом потоке; результат устаревшего запроса
+        # (generation меньше текущего) отбрасывается
+        self.worker = TranslationWorker(self.translate_job)
+        self.generation = 0
+        self.awaiting = None
+        self.poll_job = None
+
     def translate(self):
         """Основная функция, запускающая процесс трансляции."""
-        self.clear_output()
-        self.clear_highlight()
+        # Начальные пробелы не отбрасываются, чтобы позиции ошибок совпадали с полем ввода
+        input_code = self.input_text.get("1.0", "end-1c").rstrip()
+        self.generation += 1
 
-        input_code = self.input_text.get("1.0", tk.END).strip()
+        if not input_code.strip():
+            self.clear_highlight()
+            self.awaiting = None
+            self.set_output(["Введите код для трансляции."])
+            return
+
+        # Лексический и синтаксический анализ (ошибки отсортированы по позиции)
+        self.awaiting = self.generation
+        self.worker.submit(self.generation, input_code, self.all_errors.get(), self.show_stats.get())
+        if self.poll_job is None:
+            self.poll_job = self.master.after(POLL_INTERVAL_MS, self.poll_results)
+
+    def poll_results(self):
+        """Забирает результаты фонового потока и выводит последний актуальный."""
+        self.poll_job = None
+        latest = None
+        while True:
+            try:
+                generation, result = self.worker.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self.awaiting:
+                latest = result
+        if latest is not None:
+            self.awaiting = None
+            self.show_result(latest)
+        elif self.awaiting is not None:
+            self.poll_job = self.master.after(POLL_INTERVAL_MS, self.poll_results)
 
-        if not input_code:
-            self.display_output("Введите код для трансляции.")
+    def on_input_modified(self, event=None):
+        """Перезапускает отсчёт паузы живого режима при каждом изменении текста."""
+        # Сброс флага сам порождает <<Modified>>, его пропускаем
+        if not self.input_text.edit_modified():
             return
+        self.input_text.edit_modified(False)
+        self.schedule_syntax_highlight()
+        if not self.live_mode.get():
+            return
+        if self.live_job is not None:
+            self.master.after_cancel(self.live_job)
+        self.live_job = self.master.after(self.live_delay_ms, self.on_live_timeout)
+
+    def on_input_scroll(self, first, last):
+        self.input_text.vbar.set(first, last)
+        self.schedule_syntax_highlight()
+
+    def schedule_syntax_highlight(self):
+        """Откладывает раскраску до простоя цикла событий, объединяя повторные запросы."""
+        if self.syntax_job is None:
+            self.syntax_job = self.master.after_idle(self.highlight_syntax)
+
+    def highlight_syntax(self):
+        """Раскрашивает токены видимых строк с запасом SYNTAX_MARGIN_LINES."""
+        self.syntax_job = None
+        text = self.input_text
+        first_line = int(text.index("@0,0").split('.')[0])
+        last_line = int(text.index(f"@0,{text.winfo_height()}").split('.')[0])
+        first_line = max(1, first_line - SYNTAX_MARGIN_LINES)
+        last_line += SYNTAX_MARGIN_LINES
+        start, end = f"{first_line}.0", f"{last_line}.end"
+
+        # Фрагмент начинается с начала строки, а перевод строки разделяет токены,
+        # поэтому токены фрагмента совпадают с токенами всего текста
+        chunk = text.get(start, end)
+        lines = LineIndex(chunk)
+
+        def index(offset):
+            line, column = lines.position(offset)
+            return f"{first_line + line - 1}.{column}"
+
+        ranges = {tag: [] for tag in SYNTAX_COLORS}
+        for code, token_start, token_end in Lexer(chunk).iter_codes():
+            tag_ranges = ranges[SYNTAX_TAGS[code]]
+            tag_ranges.append(index(token_start))
+            tag_ranges.append(index(token_end))
+
+        for tag, tag_ranges in ranges.items():
+            text.tag_remove(tag, start, end)
+            for batch in range(0, len(tag_ranges), 2 * HIGHLIGHT_BATCH):
+                text.tag_add(tag, *tag_ranges[batch:batch + 2 * HIGHLIGHT_BATCH])
 
-        # 1. Лексический анализ
-        lexer = Lexer(input_code)
-        tokens, lexer_errors = lexer.tokenize()
+    def on_live_timeout(self):
+        self.live_job = None
+        self.translate()
 
-        if lexer_errors:
-            self.display_output("Обнаружены ошибки лексического анализа:")
-            for msg, start, end in lexer_errors:
-                self.display_output(f"- {msg}")
-                self.highlight_text(start, end)
+    def on_live_toggle(self):
+        if self.live_mode.get():
+            self.translate()
+        elif self.live_job is not None:
+            self.master.after_cancel(self.live_job)
+            self.live_job = None
+
+    def on_all_errors_toggle(self):
+        if self.live_mode.get():
+            self.translate()
+
+    def on_stats_toggle(self):
+        if self.show_stats.get():
+            self.translate()
+        else:
+            self.stats_label.grid_remove()
+
+    def show_result(self, job):
+        """Выводит результат translate_job (или исключение) и подсвечивает ошибки."""
+        self.clear_highlight()
+        if isinstance(job, Exception):
+            self.set_output(format_result_lines(job))
             return
+        result, index = job
+        self.show_stats_panel(result.stats)
+        self.set_output(format_result_lines(result))
+        if not result.ok:
+            self.highlight_errors(result.errors, index)
 
-        # 2. Синтаксический анализ
-        parser = Parser(tokens, input_code)
-        symbol_table, parser_errors = parser.parse()
-
-        if parser_errors:
-            self.display_output("Обнаружена синтаксическая ошибка:")
-            # Сортируем ошибки по позиции для корректного отображения
-            parser_errors.sort(key=lambda x: x[1])
-            for msg, start, end in parser_errors:
-                self.display_output(f"- {msg}")
-                self.highlight_text(start, end)
+    def show_stats_panel(self, stats):
+        if stats is None:
+            self.stats_label.grid_remove()
             return
+        self.stats_label.config(text=stats.format())
+        self.stats_label.grid(row=5, column=0, columnspan=2, sticky='ew', padx=5, pady=(0, 5))
 
-        # 3. Вывод результата
-        self.display_output("Трансляция успешно завершена.")
-        self.display_output("\nРезультат вычислений (восьмеричные значения):")
-        if symbol_table:
-            for var, value in symbol_table.items():
-                self.display_output(f"{var} = {format_value(value)}")
+    def translate_job(self, text, recover=False, collect_stats=False):
+        """Задача фонового потока: результат и индекс строк текста для подсветки ошибок."""
+        if collect_stats:
+            # Время фаз имеет смысл только для полной трансляции, без кэша и инкрементального анализа
+            from profiling import translate_with_stats
+            result = translate_with_stats(text, recover=recover)
+        elif recover:
+            # Инкрементальный анализ поддерживает только остановку на первой ошибке
+            result = self.cache.translate(text, recover=True)
         else:
-            self.display_output("Переменные не были объявлены.")
+            result = self.translate_text(text)
+        return result, (line_index(text) if result.errors else None)
 
-    def display_output(self, message):
-        """Отображает сообщение в поле вывода."""
-        self.output_text.config(state=tk.NORMAL)
-        self.output_text.insert(tk.END, message + "\n")
-        self.output_text.config(state=tk.DISABLED)
-        self.output_text.see(tk.END)
+    def translate_text(self, text):
+        """
+        Результат из кэша, иначе инкрементальный анализ относительно прошлого текста.
+        Вызывается только из фонового потока.
+        """
+        key = cache_key(text)
+        result = self.cache.get(key)
+        if result is None:
+            if self.engine is None:
+                self.engine = IncrementalTranslator(text)
+            else:
+                self.engine.update(text)
+            result = self.engine.result()
+            self.cache.put(key, result)
+        return result
+
+    def set_output(self, lines):
+        """Заменяет вывод списком строк; при длинном выводе включается постраничный просмотр."""
+        self.output_lines = lines
+        if len(lines) > OUTPUT_PAGE_SIZE:
+            self.pager_frame.pack(fill='x')
+        else:
+            self.pager_frame.pack_forget()
+        self.show_page(0)
+
+    def show_page(self, page):
+        """Вставляет в поле вывода строки одной страницы за одно обращение к виджету."""
+        page_count = max(1, -(-len(self.output_lines) // OUTPUT_PAGE_SIZE))
+        page = min(max(page, 0), page_count - 1)
+        self.output_page = page
+        first = page * OUTPUT_PAGE_SIZE
+        rows = self.output_lines[first:first + OUTPUT_PAGE_SIZE]
 
-    def clear_output(self):
-        """Очищает поле вывода."""
         self.output_text.config(state=tk.NORMAL)
         self.output_text.delete("1.0", tk.END)
+        if rows:
+            self.output_text.insert(tk.END, "\n".join(rows) + "\n")
         self.output_text.config(state=tk.DISABLED)
 
-    def highlight_text(self, start_index, end_index):
-        """Подсвечивает текст с ошибкой в поле ввода."""
-        start_pos = f"1.0+{start_index}c"
-        end_pos = f"1.0+{end_index}c"
-        self.input_text.tag_add("error", start_pos, end_pos)
+        if page_count > 1:
+            self.page_label.config(text=f"строки {first + 1}–{first + len(rows)} из {len(self.output_lines)}")
+            self.prev_page_button.config(state=tk.NORMAL if page > 0 else tk.DISABLED)
+            self.next_page_button.config(state=tk.NORMAL if page < page_count - 1 else tk.DISABLED)
+
+    def highlight_errors(self, errors, index):
+        """
+        Подсвечивает все ошибки, передавая диапазоны в tag_add пачками. Позиции
+        переводятся в индексы "строка.столбец" по индексу строк (lineindex), чтобы
+        Tk не отсчитывал символы от начала текста для каждой ошибки.
+        """
+        for first in range(0, len(errors), HIGHLIGHT_BATCH):
+            ranges = []
+            for msg, start, end in errors[first:first + HIGHLIGHT_BATCH]:
+                ranges.append(index.tk_index(start))
+                ranges.append(index.tk_index(end))
+            self.input_text.tag_add("error", *ranges)
 
     def clear_highlight(self):
         """Убирает всю подсветку ошибок."""
@@ -0,0 +1,354 @@
+"""
+Инкрементальный лексический и синтаксический анализ при небольших правках.
+
+Правка задаётся тройкой (смещение, длина удалённого, вставленный текст).
+
+Лексер: заново токенизируется только окно вокруг правки — от позиции сразу
+после пробельного символа перед правкой до позиции сразу после первого
+пробельного символа за ней (см. lexer.SAFE_SPLIT: ни один токен не содержит
+таких символов, поэтому токены вне окна не меняются). Позиции последующих
+токенов и ошибок сдвигаются на разницу длин.
+
+Парсер: программа делится на сегменты — блоки Множ (от Array до следующего
+Array) и Окончание (от переменной до конца входа). Если окно правки не затрагивает
+структурные токены (Start, End, Array, =) и лежит внутри одного сегмента,
+разбирается только этот сегмент:
+- без ошибок в прошлом разборе — один блок Множ или Окончание;
+- если прошлый разбор остановился на ошибке в этом же сегменте (по индексу
+  токена, на котором он остановился) — разбор продолжается с него до конца программы.
+В остальных случаях выполняется полный разбор. verify() сравнивает состояние
+с полной трансляцией текста и при расхождении бросает VerificationError.
+"""
+import bisect
+from array import array
+from itertools import islice
+
+from lexer import SAFE_SPLIT, TYPE_CODES, Lexer, TokenStream, _lex_chunk
+from parser import Parser
+from translator import TranslationResult, reached_lexer_errors, translate
+
+START_CODE = TYPE_CODES['KEYWORD_START']
+END_CODE = TYPE_CODES['KEYWORD_END']
+ARRAY_CODE = TYPE_CODES['KEYWORD_ARRAY']
+EQUALS_CODE = TYPE_CODES['PUNCTUATION_EQUALS']
+IDENTIFIER_CODE = TYPE_CODES['IDENTIFIER']
+
+# Токены, изменение которых меняет деление программы на сегменты
+STRUCTURAL_CODES = frozenset((START_CODE, END_CODE, ARRAY_CODE, EQUALS_CODE))
+
+
+class VerificationError(Exception):
+    """Инкрементальный результат разошёлся с полной трансляцией (см. IncrementalTranslator.verify)."""
+
+
+def text_edit(old, new):
+    """Находит одну правку (смещение, длина удалённого, вставленный текст), переводящую old в new."""
+    limit = min(len(old), len(new))
+    # Общий префикс и суффикс ищутся двоичным поиском сравнением срезов
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[:middle] == new[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+    low, high = 0, limit - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle:] == new[len(new) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    suffix = low
+    return prefix, len(old) - prefix - suffix, new[prefix:len(new) - suffix]
+
+
+def _shift(values, delta):
+    if not delta:
+        return values
+    return array('q', map(delta.__add__, values))
+
+
+def _shift_errors(errors, delta):
+    return [(message, start + delta, end + delta) for message, start, end in errors]
+
+
+class _ParseState:
+    """Результат разбора, разложенный по сегментам."""
+    __slots__ = ('variables', 'errors', 'target', 'expression', 'arrays',
+                 'block_starts', 'ending_index', 'failing_index')
+
+    def __init__(self):
+        self.variables = {}
+        self.errors = []
+        self.target = None
+        self.expression = None
+        self.arrays = []
+        # Индексы токенов Array каждого блока и переменной Окончания
+        self.block_starts = []
+        self.ending_index = None
+        # Индекс токена, на котором остановился разбор с ошибкой (первый непоглощённый)
+        self.failing_index = None
+
+
+class IncrementalTranslator:
+    """
+    Хранит текст, поток токенов и результат разбора и обновляет их по правкам.
+    last_update описывает последнее обновление: mode ('full', 'block', 'ending'
+    или 'resume') и relexed_tokens — число заново полученных токенов.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.tokens, errors = Lexer(text).tokenize_stream()
+        self.lexer_errors = list(errors)
+        self.state = None
+        self.last_update = {'mode': 'full', 'relexed_tokens': len(self.tokens)}
+        self._full_parse()
+
+    # --- Общий интерфейс ---
+
+    def result(self):
+        """TranslationResult, совпадающий с translator.translate(self.text)."""
+        state = self.state
+        stop = None
+        if state.failing_index is not None and state.failing_index < len(self.tokens):
+            stop = self.tokens.starts[state.failing_index]
+        lexer_errors = reached_lexer_errors(self.lexer_errors, stop)
+        if lexer_errors:
+            return TranslationResult({}, lexer_errors, 'lexer')
+        if state.errors:
+            return TranslationResult({}, sorted(state.errors, key=lambda error: error[1]), 'parser')
+        return TranslationResult(dict(state.variables), [])
+
+    def update(self, new_text):
+        """Применяет правку, переводящую текущий текст в new_text."""
+        return self.edit(*text_edit(self.text, new_text))
+
+    def edit(self, offset, removed, inserted, verify=False):
+        """Применяет правку и возвращает новый результат; verify=True сверяет его с полным разбором."""
+        window = self._relex(offset, removed, inserted)
+        if not self._reparse(*window):
+            self._full_parse()
+        if verify:
+            self.verify()
+        return self.result()
+
+    def verify(self):
+        """Сравнивает токены и результат с полной трансляцией; при расхождении — VerificationError."""
+        tokens, errors = Lexer(self.text).tokenize_stream()
+        if bytes(tokens.types) != bytes(self.tokens.types):
+            raise VerificationError("токены расходятся с полной токенизацией")
+        if tokens.starts != self.tokens.starts or tokens.ends != self.tokens.ends:
+            raise VerificationError("позиции токенов расходятся")
+        if errors != self.lexer_errors:
+            raise VerificationError("ошибки лексера расходятся")
+        expected = translate(self.text)
+        actual = self.result()
+        if (repr(expected.variables), expected.errors, expected.stage) != \
+                (repr(actual.variables), actual.errors, actual.stage):
+            raise VerificationError(f"результат расходится с полным разбором: {actual!r} != {expected!r}")
+
+    # --- Лексер ---
+
+    def _relex(self, offset, removed, inserted):
+        """
+        Обновляет текст, токены и ошибки лексера. Возвращает (первый индекс окна,
+        конец окна в старом потоке, конец окна в новом потоке, сдвиг позиций, старые типы окна).
+        """
+        old_text = self.text
+        text = old_text[:offset] + inserted + old_text[offset + removed:]
+        delta = len(inserted) - removed
+
+        # Начало окна — сразу после пробельного символа перед правкой
+        restart = offset
+        while restart > 0 and not SAFE_SPLIT.match(text, restart - 1):
+            restart -= 1
+        # Конец окна — сразу после первого пробельного символа за правкой
+        match = SAFE_SPLIT.search(text, offset + len(inserted))
+        resync = match.end() if match else len(text)
+        old_resync = resync - delta
+
+        tokens = self.tokens
+        first = bisect.bisect_left(tokens.starts, restart)
+        old_last = bisect.bisect_left(tokens.starts, old_resync)
+        types, starts, ends, errors = _lex_chunk((text[restart:resync], restart, 'regex'))
+
+        window_starts = array('q')
+        window_starts.frombytes(starts)
+        window_ends = array('q')
+        window_ends.frombytes(ends)
+        stream = TokenStream(text)
+        stream.types = tokens.types[:first] + array('B', types) + tokens.types[old_last:]
+        stream.starts = tokens.starts[:first] + window_starts + _shift(tokens.starts[old_last:], delta)
+        stream.ends = tokens.ends[:first] + window_ends + _shift(tokens.ends[old_last:], delta)
+        old_window_types = bytes(tokens.types[first:old_last])
+
+        self.lexer_errors = (
+            [error for error in self.lexer_errors if error[1] < restart]
+            + errors
+            + _shift_errors([error for error in self.lexer_errors if error[1] >= old_resync], delta)
+        )
+        self.text = text
+        self.tokens = stream
+        relexed = len(types)
+        self.last_update = {'mode': None, 'relexed_tokens': relexed}
+        return first, old_last, first + relexed, delta, old_window_types
+
+    # --- Парсер ---
+
+    def _positioned_parser(self, index):
+        """Парсер, начинающий разбор с токена index нового потока."""
+        tokens = self.tokens
+        parser = Parser(islice(zip(tokens.types, tokens.starts, tokens.ends), index, None), self.text)
+        if index:
+            parser.last_item = (tokens.types[index - 1], tokens.starts[index - 1], tokens.ends[index - 1])
+        return parser
+
+    @staticmethod
+    def _run(method):
+        try:
+            method()
+        except Exception:
+            pass
+
+    def _full_parse(self):
+        if self.last_update['mode'] is None:
+            self.last_update['mode'] = 'full'
+        state = _ParseState()
+        parser = Parser(self.tokens, self.text)
+        state.variables, state.errors = parser.parse()
+        state.target, state.expression, state.arrays = parser.target, parser.expression, parser.arrays
+        state.failing_index = parser.current_token_index if state.errors else None
+        self.state = state
+        self._find_segments(state)
+
+    def _find_segments(self, state):
+        """Находит сегменты программы; при нестандартной структуре инкрементальный разбор отключается."""
+        types = bytes(self.tokens.types)
+        ending = types.find(IDENTIFIER_CODE)
+        if not types or types[0] != START_CODE or ending == -1 or types[ending + 1:ending + 2] != bytes((EQUALS_CODE,)):
+            state.block_starts = None
+            return
+        block_starts = []
+        position = types.find(ARRAY_CODE, 0, ending)
+        while position != -1:
+            block_starts.append(position)
+            position = types.find(ARRAY_CODE, position + 1, ending)
+        if not block_starts or block_starts[0] != 1:
+            state.block_starts = None
+            return
+        state.block_starts = block_starts
+        state.ending_index = ending
+
+    def _segment_of(self, index):
+        """Номер сегмента токена index (len(block_starts) — Окончание, -1 — Start)."""
+        state = self.state
+        if index >= state.ending_index:
+            return len(state.block_starts)
+        return bisect.bisect_right(state.block_starts, index) - 1
+
+    def _failing_segment(self):
+        """
+        Сегмент, на котором остановился разбор с ошибкой, или None, если последний
+        поглощённый и первый непоглощённый токены лежат в разных сегментах.
+        """
+        index = self.state.failing_index
+        segment = self._segment_of(index - 1)
+        if index < len(self.tokens) and self._segment_of(index) != segment:
+            return None
+        return segment
+
+    def _reparse(self, first, old_last, new_last, delta, old_window_types):
+        """Разбирает только затронутый сегмент. Возвращает False, если нужен полный разбор."""
+        state = self.state
+        if state.block_starts is None or first == 0:
+            return False
+        new_window_types = bytes(self.tokens.types[first:new_last])
+        if STRUCTURAL_CODES.intersection(old_window_types) or STRUCTURAL_CODES.intersection(new_window_types):
+            return False
+
+        # Сегмент, в котором лежит токен перед окном (индексы ещё в старом потоке)
+        count_delta = new_last - old_last
+        segment = bisect.bisect_right(state.block_starts, first - 1) - 1
+        in_ending = first - 1 >= state.ending_index
+        if in_ending:
+            if first < state.ending_index + 2:
+                return False
+            segment = len(state.block_starts)
+        elif IDENTIFIER_CODE in old_window_types or IDENTIFIER_CODE in new_window_types:
+            return False
+
+        # Индексы прошлого разбора ещё в старом потоке, как и first
+        if state.failing_index is not None and self._failing_segment() != segment:
+            return False
+
+        # Сдвигаем индексы сегментов после окна
+        state.block_starts = [index + count_delta if index >= old_last else index for index in state.block_starts]
+        if state.ending_index >= old_last:
+            state.ending_index += count_delta
+
+        if state.failing_index is not None:
+            self._resume(segment)
+        elif in_ending:
+            self._reparse_ending()
+        else:
+            self._reparse_block(segment)
+        return True
+
+    def _reparse_block(self, number):
+        state = self.state
+        start = state.block_starts[number]
+        next_start = state.block_starts[number + 1] if number + 1 < len(state.block_starts) else state.ending_index
+        parser = self._positioned_parser(start)
+        self._run(parser.parse_Mnozh)
+        if parser.errors:
+            # Разбор остановился бы на этом блоке
+            self._set_failure(parser, start)
+            state.arrays = state.arrays[:number]
+            return
+        if parser.current_token_index != next_start - start:
+            self._full_parse()
+            return
+        state.arrays[number] = parser.arrays[0]
+        # Позиции ошибок нет, значения переменных от блоков Множ не зависят
+        self.last_update['mode'] = 'block'
+
+    def _reparse_ending(self):
+        state = self.state
+        parser = self._positioned_parser(state.ending_index)
+        self._run(parser.parse_Ending)
+        state.variables = parser.symbol_table
+        state.errors = parser.errors
+        state.target, state.expression = parser.target, parser.expression
+        state.failing_index = state.ending_index + parser.current_token_index if parser.errors else None
+        self.last_update['mode'] = 'ending'
+
+    def _resume(self, segment):
+        """Продолжает разбор с сегмента, на котором прошлый разбор остановился с ошибкой."""
+        state = self.state
+        if segment == len(state.block_starts):
+            self._reparse_ending()
+            self.last_update['mode'] = 'resume'
+            return
+        start = state.block_starts[segment]
+        parser = self._positioned_parser(start)
+        parser.arrays = state.arrays[:segment]
+
+        def parse_rest():
+            parser.parse_Mnozh_blocks(found_mnozh=True)
+            parser.parse_Ending()
+        self._run(parse_rest)
+        state.variables = parser.symbol_table
+        state.errors = parser.errors
+        state.target, state.expression, state.arrays = parser.target, parser.expression, parser.arrays
+        state.failing_index = start + parser.current_token_index if parser.errors else None
+        self.last_update['mode'] = 'resume'
+
+    def _set_failure(self, parser, start):
+        state = self.state
+        state.variables = parser.symbol_table
+        state.errors = parser.errors
+        state.target = state.expression = None
+        state.failing_index = start + parser.current_token_index
+        self.last_update['mode'] = 'block'
@@ -1,4 +1,10 @@
+import mmap
+import os
 import re
+from array import array
+from contextlib import contextmanager
+
+import lineindex
 
 # Use a list of tuples to define token patterns.
 # The order is crucial: more specific patterns (like keywords) must come before more general ones.
@@ -46,9 +52,164 @@ TOKEN_SPECIFICATION = [
 
 # Build the master regex from the specification list
 TOKEN_REGEX = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_SPECIFICATION)
+TOKEN_PATTERN = re.compile(TOKEN_REGEX)
+
+# Байтовый вариант для входа в виде bytes/mmap (язык чисто ASCII).
+# В байтовом режиме \s не включает \x1c-\x1f, поэтому пробельные символы перечислены явно,
+# чтобы токены совпадали со строковым режимом.
+BYTES_WHITESPACE = r'[ \t\n\r\f\v\x1c-\x1f]+'
+TOKEN_PATTERN_BYTES = re.compile('|'.join(
+    f'(?P<{name}>{BYTES_WHITESPACE if name == "WHITESPACE" else pattern})'
+    for name, pattern in TOKEN_SPECIFICATION
+).encode('ascii'))
+
+# Типы токенов, которые попадают в поток, и их целочисленные коды.
+# NAME переклассифицируется в IDENTIFIER, WHITESPACE и UNKNOWN в поток не попадают.
+TOKEN_TYPES = tuple(name for name, _ in TOKEN_SPECIFICATION if name not in ('NAME', 'WHITESPACE', 'UNKNOWN'))
+TYPE_CODES = {name: code for code, name in enumerate(TOKEN_TYPES)}
+
+# Коды для служебных групп регулярного выражения (не являются типами токенов)
+CODE_WHITESPACE = -1
+CODE_UNKNOWN = -2
+
+# Код токена по номеру группы совпадения (match.lastindex), индекс 0 не используется
+GROUP_CODES = [None] + [
+    CODE_WHITESPACE if name == 'WHITESPACE' else
+    CODE_UNKNOWN if name == 'UNKNOWN' else
+    TYPE_CODES['IDENTIFIER' if name == 'NAME' else name]
+    for name, _ in TOKEN_SPECIFICATION
+]
+
+# --- Таблица классов символов для табличного сканера ---
+
+CLASS_OTHER = 0      # начало UNKNOWN
+CLASS_LETTER = 1
+CLASS_DIGIT = 2
+CLASS_SPACE = 3
+CLASS_SINGLE = 4     # односимвольный токен (код в SINGLE_CODES)
+CLASS_STAR = 5       # '*' или '**'
+
+SINGLE_CODES = {
+    '+': TYPE_CODES['OPERATOR_PLUS'],
+    '-': TYPE_CODES['OPERATOR_MINUS'],
+    '/': TYPE_CODES['OPERATOR_DIVIDE'],
+    '[': TYPE_CODES['PUNCTUATION_LBRACKET'],
+    ']': TYPE_CODES['PUNCTUATION_RBRACKET'],
+    '=': TYPE_CODES['PUNCTUATION_EQUALS'],
+    ',': TYPE_CODES['PUNCTUATION_COMMA'],
+    '.': TYPE_CODES['PUNCTUATION_DOT'],
+    '(': TYPE_CODES['INVALID_LPAREN'],
+    ')': TYPE_CODES['INVALID_RPAREN'],
+    '{': TYPE_CODES['INVALID_LBRACE'],
+    '}': TYPE_CODES['INVALID_RBRACE'],
+}
+
+# Ключевые слова в порядке TOKEN_SPECIFICATION: совпадают как префикс слова
+KEYWORDS = (
+    ('Start', TYPE_CODES['KEYWORD_START']),
+    ('End', TYPE_CODES['KEYWORD_END']),
+    ('Array', TYPE_CODES['KEYWORD_ARRAY']),
+)
+
+# Символы, на которых заканчивается последовательность UNKNOWN
+UNKNOWN_STOP = frozenset(' \t\n\r\f\v+-*/[]=,.(){}')
+
+
+def _build_char_classes():
+    table = []
+    for o in range(128):
+        ch = chr(o)
+        if ('A' <= ch <= 'Z') or ('a' <= ch <= 'z'):
+            table.append(CLASS_LETTER)
+        elif '0' <= ch <= '9':
+            table.append(CLASS_DIGIT)
+        elif ch == '*':
+            table.append(CLASS_STAR)
+        elif ch in SINGLE_CODES:
+            table.append(CLASS_SINGLE)
+        elif ch.isspace():
+            table.append(CLASS_SPACE)
+        else:
+            table.append(CLASS_OTHER)
+    return table
+
+# Класс каждого ASCII-символа; остальные символы: CLASS_SPACE для пробельных, иначе CLASS_OTHER
+CHAR_CLASSES = _build_char_classes()
+
+LEXER_BACKENDS = ('regex', 'table')
+
+# --- Параллельная токенизация по кускам ---
+
+# Ни один токен не содержит этих символов, поэтому вход можно резать сразу после них
+SAFE_SPLIT = re.compile(r'[ \t\n\r\f\v]')
+SAFE_SPLIT_BYTES = re.compile(rb'[ \t\n\r\f\v]')
+
+# Размер куска по умолчанию (в символах или байтах)
+DEFAULT_CHUNK_SIZE = 4 * 2 ** 20
+
+
+def split_chunks(text, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Делит вход на куски длиной не меньше chunk_size по безопасным границам
+    (сразу после пробельного символа). Возвращает список пар (начало, конец).
+    """
+    pattern = SAFE_SPLIT if isinstance(text, str) else SAFE_SPLIT_BYTES
+    length = len(text)
+    bounds = []
+    start = 0
+    while length - start > chunk_size:
+        match = pattern.search(text, start + chunk_size)
+        if not match:
+            break
+        bounds.append((start, match.end()))
+        start = match.end()
+    bounds.append((start, length))
+    return bounds
+
+
+def _lex_chunk(task):
+    """Токенизирует один кусок в процессе-обработчике и сдвигает позиции на его смещение."""
+    chunk, offset, backend = task
+    lexer = Lexer(chunk, backend=backend)
+    types = array('B')
+    starts = array('q')
+    ends = array('q')
+    for code, start, end in lexer.iter_codes():
+        types.append(code)
+        starts.append(start + offset)
+        ends.append(end + offset)
+    errors = [(msg, start + offset, end + offset) for msg, start, end in lexer.errors]
+    return types.tobytes(), starts.tobytes(), ends.tobytes(), errors
+
+
+def token_text(source, start, end):
+    """Возвращает текст токена; байтовые источники (bytes, mmap) декодируются как ASCII."""
+    value = source[start:end]
+    if isinstance(value, bytes):
+        return value.decode('ascii', 'replace')
+    return value
+
+
+@contextmanager
+def map_source_file(path):
+    """
+    Отображает файл в память только для чтения и отдаёт буфер mmap,
+    который можно передать в Lexer и Parser вместо строки.
+    Позиции токенов и ошибок в этом случае являются смещениями в байтах.
+    """
+    with open(path, 'rb') as source_file:
+        if os.fstat(source_file.fileno()).st_size == 0:
+            # Пустой файл нельзя отобразить в память
+            yield b''
+            return
+        with mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
 
 class Token:
     """Класс для представления токена."""
+    __slots__ = ('type', 'value', 'start', 'end')
+
     def __init__(self, type, value, start, end):
         self.type = type
         self.value = value
@@ -59,37 +220,249 @@ class Token:
         return f"Token({self.type}, '{self.value}', pos {self.start}-{self.end})"
 
 
-class Lexer:
-    """Лексический анализатор, который разбивает текст на токены."""
+class TokenStream:
+    """
+    Компактный поток токенов в виде набора массивов (struct-of-arrays).
+    Коды типов, начала и концы хранятся в буферах array, значения токенов
+    вычисляются лениво как срезы исходного текста.
+    Индексация и итерация возвращают объекты Token для совместимости.
+    """
+    __slots__ = ('text', 'types', 'starts', 'ends')
+
     def __init__(self, text):
         self.text = text
+        self.types = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+
+    @classmethod
+    def from_tokens(cls, tokens, text):
+        """Строит поток из списка объектов Token."""
+        stream = cls(text)
+        for token in tokens:
+            stream.append(TYPE_CODES[token.type], token.start, token.end)
+        return stream
+
+    def append(self, code, start, end):
+        self.types.append(code)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self):
+        return len(self.types)
+
+    def type_name(self, index):
+        return TOKEN_TYPES[self.types[index]]
+
+    def value(self, index):
+        return token_text(self.text, self.starts[index], self.ends[index])
+
+    def token(self, index):
+        """Материализует токен с указанным индексом."""
+        start = self.starts[index]
+        end = self.ends[index]
+        return Token(TOKEN_TYPES[self.types[index]], token_text(self.text, start, end), start, end)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.token(i) for i in range(*index.indices(len(self)))]
+        return self.token(index)
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield self.token(index)
+
+    def to_tokens(self):
+        """Возвращает список объектов Token (совместимый API)."""
+        text = self.text
+        names = TOKEN_TYPES
+        return [Token(names[code], token_text(text, start, end), start, end)
+                for code, start, end in zip(self.types, self.starts, self.ends)]
+
+
+class Lexer:
+    """
+    Лексический анализатор, который разбивает текст на токены.
+    Текст может быть строкой или байтовым буфером (bytes, mmap) в кодировке ASCII.
+    """
+    def __init__(self, text, backend='regex'):
+        if backend not in LEXER_BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд лексера '{backend}', допустимы: {', '.join(LEXER_BACKENDS)}")
+        if backend == 'table' and not isinstance(text, str):
+            raise ValueError("Бэкенд лексера 'table' поддерживает только строковый ввод")
+        self.text = text
+        self.backend = backend
         self.errors = []
 
+    @property
+    def line_index(self):
+        """Индекс начал строк входного текста (см. lineindex), общий с парсером и GUI."""
+        return lineindex.line_index(self.text)
+
     def tokenize(self):
         """
         Выполняет токенизацию входного текста.
         Возвращает список токенов и список ошибок.
+        Токены строятся прямо по ходу сканирования, без промежуточного TokenStream.
         """
-        tokens = []
-        # Итерация по всем совпадениям в тексте
-        for match in re.finditer(TOKEN_REGEX, self.text):
-            token_type = match.lastgroup
-            token_value = match.group(token_type)
-            token_start = match.start()
-            token_end = match.end()
+        text = self.text
+        if not isinstance(text, str):
+            return list(self.iter_tokens()), self.errors
+        names = TOKEN_TYPES
+        tokens = [Token(names[code], text[start:end], start, end) for code, start, end in self.iter_codes()]
+        return tokens, self.errors
+
+    def tokenize_stream(self):
+        """
+        Выполняет токенизацию входного текста в компактный TokenStream.
+        Возвращает поток токенов и список ошибок.
+        """
+        stream = TokenStream(self.text)
+        types_append = stream.types.append
+        starts_append = stream.starts.append
+        ends_append = stream.ends.append
+        for code, start, end in self.iter_codes():
+            types_append(code)
+            starts_append(start)
+            ends_append(end)
+        return stream, self.errors
+
+    def parallel_chunks(self, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Границы кусков для tokenize_parallel или None, если пул не нужен:
+        вход из одного куска, workers == 1 или одно ядро (os.cpu_count()).
+        """
+        if workers == 1 or (os.cpu_count() or 1) == 1:
+            return None
+        bounds = split_chunks(self.text, chunk_size)
+        return bounds if len(bounds) > 1 else None
 
-            if token_type == 'WHITESPACE':
-                continue 
+    def tokenize_parallel(self, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Токенизирует вход по кускам в пуле процессов (ProcessPoolExecutor).
+        Куски режутся по пробельным символам, позиции сдвигаются обратно,
+        результаты объединяются в один упорядоченный TokenStream и список ошибок.
+        Если пул не нужен (см. parallel_chunks), вход токенизируется в текущем процессе.
+        """
+        bounds = self.parallel_chunks(workers, chunk_size)
+        if bounds is None:
+            return self.tokenize_stream()
+
+        from concurrent.futures import ProcessPoolExecutor
 
-            if token_type == 'UNKNOWN':
-                msg = f"Неизвестное слово или символ '{token_value}'"
+        tasks = [(self.text[start:end], start, self.backend) for start, end in bounds]
+        stream = TokenStream(self.text)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for types, starts, ends, errors in executor.map(_lex_chunk, tasks):
+                stream.types.frombytes(types)
+                stream.starts.frombytes(starts)
+                stream.ends.frombytes(ends)
+                self.errors.extend(errors)
+        return stream, self.errors
+
+    def iter_codes(self):
+        """
+        Лениво выдаёт токены в виде троек (код типа, начало, конец).
+        Лексические ошибки добавляются в self.errors по мере чтения.
+        """
+        if self.backend == 'table':
+            return self._scan_table()
+        return self._scan_regex()
+
+    def iter_tokens(self):
+        """Лениво выдаёт объекты Token."""
+        text = self.text
+        for code, start, end in self.iter_codes():
+            yield Token(TOKEN_TYPES[code], token_text(text, start, end), start, end)
+
+    def _scan_regex(self):
+        """Бэкенд на основе единого регулярного выражения TOKEN_REGEX."""
+        group_codes = GROUP_CODES
+        if isinstance(self.text, str):
+            matches = TOKEN_PATTERN.finditer(self.text)
+        else:
+            matches = TOKEN_PATTERN_BYTES.finditer(self.text)
+        # Итерация по всем совпадениям в тексте
+        for match in matches:
+            code = group_codes[match.lastindex]
+            if code >= 0:
+                start, end = match.span()
+                yield code, start, end
+            elif code == CODE_UNKNOWN:
+                token_start, token_end = match.span()
+                msg = f"Неизвестное слово или символ '{token_text(self.text, token_start, token_end)}'"
                 self.errors.append((msg, token_start, token_end))
-                continue
 
-            # Re-classify general 'NAME' tokens as 'IDENTIFIER' so the parser can handle them.
-            if token_type == 'NAME':
-                token_type = 'IDENTIFIER'
+    def _scan_table(self):
+        """
+        Однопроходный сканер, управляемый таблицей классов символов.
+        Даёт те же токены, позиции и ошибки UNKNOWN, что и бэкенд 'regex'.
+        """
+        text = self.text
+        n = len(text)
+        classes = CHAR_CLASSES
+        identifier = TYPE_CODES['IDENTIFIER']
+        number = TYPE_CODES['NUMBER']
+        power = TYPE_CODES['OPERATOR_POWER']
+        multiply = TYPE_CODES['OPERATOR_MULTIPLY']
+
+        def char_class(ch):
+            o = ord(ch)
+            if o < 128:
+                return classes[o]
+            return CLASS_SPACE if ch.isspace() else CLASS_OTHER
 
-            tokens.append(Token(token_type, token_value, token_start, token_end))
+        i = 0
+        while i < n:
+            ch = text[i]
+            cls = char_class(ch)
+            start = i
+
+            if cls == CLASS_SPACE:
+                i += 1
+                while i < n and text[i].isspace():
+                    i += 1
+                continue
+
+            if cls == CLASS_SINGLE:
+                i += 1
+                code = SINGLE_CODES[ch]
+            elif cls == CLASS_STAR:
+                if i + 1 < n and text[i + 1] == '*':
+                    i += 2
+                    code = power
+                else:
+                    i += 1
+                    code = multiply
+            elif cls == CLASS_DIGIT:
+                i += 1
+                while i < n and char_class(text[i]) == CLASS_DIGIT:
+                    i += 1
+                code = number
+            elif cls == CLASS_LETTER:
+                for keyword, keyword_code in KEYWORDS:
+                    if text.startswith(keyword, i):
+                        i += len(keyword)
+                        code = keyword_code
+                        break
+                else:
+                    if (i + 4 < n and char_class(text[i + 1]) == CLASS_LETTER
+                            and char_class(text[i + 2]) == CLASS_DIGIT
+                            and char_class(text[i + 3]) == CLASS_DIGIT
+                            and char_class(text[i + 4]) == CLASS_DIGIT):
+                        i += 5
+                    else:
+                        i += 1
+                        while i < n and char_class(text[i]) == CLASS_LETTER:
+                            i += 1
+                    # NAME сразу классифицируется как IDENTIFIER
+                    code = identifier
+            else:
+                i += 1
+                while i < n and text[i] not in UNKNOWN_STOP:
+                    i += 1
+                msg = f"Неизвестное слово или символ '{text[start:i]}'"
+                self.errors.append((msg, start, i))
+                continue
 
-        return tokens, self.errors
\ No newline at end of file
+            yield code, start, i
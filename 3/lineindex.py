@@ -0,0 +1,61 @@
+"""
+Индекс начал строк: перевод смещения в символах в (строка, столбец).
+
+Начала строк хранятся в array('q') и вычисляются один раз на текст, поиск строки —
+bisect, O(log n) на смещение. Строки нумеруются с 1, столбцы с 0, как в индексах
+Tk "строка.столбец". line_index(text) кэширует индекс последних текстов, поэтому
+лексер, парсер, CLI и GUI пользуются одним и тем же индексом.
+"""
+import bisect
+import re
+from array import array
+from functools import lru_cache
+
+NEWLINE = re.compile('\n')
+NEWLINE_BYTES = re.compile(b'\n')
+
+
+class LineIndex:
+    """Начала строк текста (str, bytes или mmap)."""
+    __slots__ = ('starts',)
+
+    def __init__(self, text):
+        pattern = NEWLINE if isinstance(text, str) else NEWLINE_BYTES
+        starts = array('q', [0])
+        starts.extend(match.end() for match in pattern.finditer(text))
+        self.starts = starts
+
+    def __len__(self):
+        """Количество строк."""
+        return len(self.starts)
+
+    def position(self, offset):
+        """(строка с 1, столбец с 0) для смещения."""
+        line = bisect.bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1]
+
+    def offset(self, line, column):
+        """Смещение по строке (с 1) и столбцу (с 0)."""
+        return self.starts[line - 1] + column
+
+    def tk_index(self, offset):
+        """Индекс Tk "строка.столбец" для смещения."""
+        line, column = self.position(offset)
+        return f"{line}.{column}"
+
+    def location(self, offset):
+        """Позиция "строка:столбец" для сообщений (столбцы с 1)."""
+        line, column = self.position(offset)
+        return f"{line}:{column + 1}"
+
+
+@lru_cache(maxsize=4)
+def _cached_index(text):
+    return LineIndex(text)
+
+
+def line_index(text):
+    """Индекс для текста; для строк берётся из кэша последних текстов."""
+    if isinstance(text, str):
+        return _cached_index(text)
+    return LineIndex(text)
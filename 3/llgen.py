@@ -0,0 +1,193 @@
+"""
+Генератор предиктивного LL(1)-парсера по грамматике в формате grammar.bnf.
+
+Вычисляет множества FIRST и FOLLOW и строит таблицу разбора.
+Запуск: python 3/llgen.py [путь к грамматике] — печатает множества и таблицу.
+"""
+import os
+import sys
+
+EPSILON = 'ε'
+END_MARKER = '$'
+
+DEFAULT_GRAMMAR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grammar.bnf')
+
+
+class GrammarError(Exception):
+    """Ошибка в описании грамматики или конфликт LL(1)."""
+
+
+def is_action(symbol):
+    return symbol.startswith('@')
+
+
+def is_terminal(symbol):
+    return symbol.isupper() or symbol == END_MARKER
+
+
+class Grammar:
+    """Грамматика: упорядоченные правила нетерминал -> список альтернатив."""
+    def __init__(self, rules, start):
+        self.rules = rules
+        self.start = start
+
+    @property
+    def nonterminals(self):
+        return list(self.rules)
+
+    @property
+    def terminals(self):
+        found = []
+        for alternatives in self.rules.values():
+            for alternative in alternatives:
+                for symbol in alternative:
+                    if is_terminal(symbol) and symbol not in found:
+                        found.append(symbol)
+        return found
+
+    @property
+    def actions(self):
+        found = []
+        for alternatives in self.rules.values():
+            for alternative in alternatives:
+                for symbol in alternative:
+                    if is_action(symbol) and symbol[1:] not in found:
+                        found.append(symbol[1:])
+        return found
+
+
+def parse_grammar(text):
+    """Разбирает текст грамматики в объект Grammar."""
+    rules = {}
+    start = None
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        if '=' not in line:
+            raise GrammarError(f"Строка {line_number}: ожидалось 'Нетерминал = ...'")
+        name, body = (part.strip() for part in line.split('=', 1))
+        if not name or is_terminal(name) or is_action(name):
+            raise GrammarError(f"Строка {line_number}: некорректное имя нетерминала '{name}'")
+        if name in rules:
+            raise GrammarError(f"Строка {line_number}: повторное определение '{name}'")
+        alternatives = []
+        for alternative in body.split('|'):
+            symbols = [symbol for symbol in alternative.split() if symbol != EPSILON]
+            alternatives.append(symbols)
+        rules[name] = alternatives
+        if start is None:
+            start = name
+
+    if start is None:
+        raise GrammarError("Грамматика пуста")
+    for name, alternatives in rules.items():
+        for alternative in alternatives:
+            for symbol in alternative:
+                if not is_terminal(symbol) and not is_action(symbol) and symbol not in rules:
+                    raise GrammarError(f"В правиле '{name}' используется неопределённый нетерминал '{symbol}'")
+    return Grammar(rules, start)
+
+
+def load_grammar(path=DEFAULT_GRAMMAR_PATH):
+    with open(path, encoding='utf-8') as grammar_file:
+        return parse_grammar(grammar_file.read())
+
+
+def first_of_sequence(symbols, first):
+    """FIRST для последовательности символов (действия пропускаются)."""
+    result = set()
+    for symbol in symbols:
+        if is_action(symbol):
+            continue
+        if is_terminal(symbol):
+            result.add(symbol)
+            return result
+        result |= first[symbol] - {EPSILON}
+        if EPSILON not in first[symbol]:
+            return result
+    result.add(EPSILON)
+    return result
+
+
+def compute_first(grammar):
+    first = {name: set() for name in grammar.rules}
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in grammar.rules.items():
+            for alternative in alternatives:
+                addition = first_of_sequence(alternative, first)
+                if not addition <= first[name]:
+                    first[name] |= addition
+                    changed = True
+    return first
+
+
+def compute_follow(grammar, first):
+    follow = {name: set() for name in grammar.rules}
+    follow[grammar.start].add(END_MARKER)
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in grammar.rules.items():
+            for alternative in alternatives:
+                for index, symbol in enumerate(alternative):
+                    if is_terminal(symbol) or is_action(symbol):
+                        continue
+                    rest = first_of_sequence(alternative[index + 1:], first)
+                    addition = rest - {EPSILON}
+                    if EPSILON in rest:
+                        addition |= follow[name]
+                    if not addition <= follow[symbol]:
+                        follow[symbol] |= addition
+                        changed = True
+    return follow
+
+
+def build_table(grammar, first, follow):
+    """
+    Строит таблицу {(нетерминал, терминал): номер альтернативы}.
+    При конфликте (грамматика не LL(1)) вызывает GrammarError.
+    """
+    table = {}
+    for name, alternatives in grammar.rules.items():
+        for index, alternative in enumerate(alternatives):
+            lookahead = first_of_sequence(alternative, first)
+            if EPSILON in lookahead:
+                lookahead = (lookahead - {EPSILON}) | follow[name]
+            for terminal in lookahead:
+                if (name, terminal) in table:
+                    raise GrammarError(f"Конфликт LL(1): '{name}' по терминалу '{terminal}'")
+                table[(name, terminal)] = index
+    return table
+
+
+class ParserTables:
+    """Результат генерации: грамматика, FIRST, FOLLOW и таблица разбора."""
+    def __init__(self, grammar):
+        self.grammar = grammar
+        self.first = compute_first(grammar)
+        self.follow = compute_follow(grammar, self.first)
+        self.table = build_table(grammar, self.first, self.follow)
+
+    def format(self):
+        lines = ["FIRST:"]
+        for name in self.grammar.nonterminals:
+            lines.append(f"  {name}: {{{', '.join(sorted(self.first[name]))}}}")
+        lines.append("FOLLOW:")
+        for name in self.grammar.nonterminals:
+            lines.append(f"  {name}: {{{', '.join(sorted(self.follow[name]))}}}")
+        lines.append("Таблица разбора:")
+        for (name, terminal), index in sorted(self.table.items()):
+            alternative = ' '.join(self.grammar.rules[name][index]) or EPSILON
+            lines.append(f"  [{name}, {terminal}] -> {alternative}")
+        return "\n".join(lines)
+
+
+def generate(path=DEFAULT_GRAMMAR_PATH):
+    return ParserTables(load_grammar(path))
+
+
+if __name__ == "__main__":
+    print(generate(*sys.argv[1:2]).format())
@@ -0,0 +1,428 @@
+"""
+Табличный LL(1)-парсер, построенный генератором llgen.py по grammar.bnf.
+
+Разбор выполняется одним циклом по стеку символов с целочисленными кодами
+токенов: на каждом шаге раскрытие нетерминала — один поиск в таблице
+(нетерминалы в начале правила раскрываются заранее, при сборке таблицы).
+Корректные числа блока Множ поглощаются быстрым путём Parser.take_numbers.
+Построение дерева выражения и проверки чисел выполняются семантическими
+действиями (@имя в грамматике), сообщения об ошибках совпадают с Parser.
+"""
+import re
+
+from columns import KIND_COMPLEX, KIND_INT, KIND_REAL, ArrayBlockBuilder
+from expr import BinOp, Neg, Num, Var
+from lexer import TOKEN_TYPES, TYPE_CODES, token_text
+from llgen import END_MARKER, EPSILON, GrammarError, generate, is_action, is_terminal
+from parser import Parser, octal_str_to_float
+
+# Код конца входа в таблице разбора (следует за кодами типов токенов)
+EOF_CODE = len(TOKEN_TYPES)
+NUMBER_CODE = TYPE_CODES['NUMBER']
+
+OPERATOR_TYPES = ('OPERATOR_PLUS', 'OPERATOR_MINUS', 'OPERATOR_MULTIPLY', 'OPERATOR_DIVIDE', 'OPERATOR_POWER')
+# Текст бинарного оператора по коду его токена
+OPERATOR_TEXT = {TYPE_CODES[name]: text for name, text in zip(OPERATOR_TYPES, ('+', '-', '*', '/', '**'))}
+INVALID_BRACKET_TYPES = ('INVALID_LPAREN', 'INVALID_RPAREN', 'INVALID_LBRACE', 'INVALID_RBRACE')
+EXPRESSION_NONTERMINALS = ('RightPart', 'FirstBlok3', 'Blok1', 'Blok2', 'Atom')
+TAIL_NONTERMINALS = ('RightTail', 'Blok1Tail', 'Blok2Tail')
+ARRAY_NONTERMINALS = ('NumList', 'NumFrac', 'NumKompl', 'MnozhTail')
+
+
+class CompiledTables:
+    """
+    Таблица разбора в целочисленном виде. Символы стека кодируются так:
+    [0, nonterminal_base) — вхождения терминалов в правила,
+    [nonterminal_base, action_base) — нетерминалы, дальше — действия.
+    """
+    def __init__(self, tables):
+        grammar = tables.grammar
+        self.nonterminals = grammar.nonterminals
+        self.actions = grammar.actions
+        self.occurrence_codes = []
+        self.occurrence_owners = []
+
+        for name, alternatives in grammar.rules.items():
+            for alternative in alternatives:
+                for symbol in alternative:
+                    if is_terminal(symbol) and symbol not in TYPE_CODES:
+                        raise GrammarError(f"Терминал '{symbol}' не является типом токена лексера")
+
+        self.nonterminal_base = sum(
+            1 for alternatives in grammar.rules.values()
+            for alternative in alternatives for symbol in alternative if is_terminal(symbol)
+        )
+        self.action_base = self.nonterminal_base + len(self.nonterminals)
+        nonterminal_ids = {name: self.nonterminal_base + i for i, name in enumerate(self.nonterminals)}
+        action_ids = {name: self.action_base + i for i, name in enumerate(self.actions)}
+
+        encoded = {}
+        for name, alternatives in grammar.rules.items():
+            encoded[name] = []
+            for alternative in alternatives:
+                symbols = []
+                for symbol in alternative:
+                    if is_terminal(symbol):
+                        symbols.append(len(self.occurrence_codes))
+                        self.occurrence_codes.append(TYPE_CODES[symbol])
+                        self.occurrence_owners.append((name, symbol))
+                    elif is_action(symbol):
+                        symbols.append(action_ids[symbol[1:]])
+                    else:
+                        symbols.append(nonterminal_ids[symbol])
+                # В стек правая часть кладётся в обратном порядке
+                encoded[name].append(tuple(reversed(symbols)))
+
+        self.table = [[None] * (EOF_CODE + 1) for _ in self.nonterminals]
+        for (name, terminal), index in tables.table.items():
+            code = EOF_CODE if terminal == END_MARKER else TYPE_CODES[terminal]
+            self.table[nonterminal_ids[name] - self.nonterminal_base][code] = encoded[name][index]
+        self.table = [[self.expand_leading(alternative, code) for code, alternative in enumerate(row)]
+                      for row in self.table]
+        self.start_symbol = nonterminal_ids[grammar.start]
+        self.nonterminal_ids = nonterminal_ids
+        self.nullable = frozenset(nonterminal_ids[name] for name in self.nonterminals if EPSILON in tables.first[name])
+
+    def expand_leading(self, alternative, code):
+        """
+        Заранее раскрывает нетерминалы в начале правой части для того же токена code:
+        до сдвига токена их раскрытие однозначно, и цикл разбора не тратит на них шаги.
+        Раскрытие останавливается на терминале, действии или нетерминале без правила
+        для code (ошибку по нему сообщит цикл разбора, стек будет тем же).
+        """
+        if alternative is None:
+            return None
+        symbols = list(alternative)
+        while symbols and self.nonterminal_base <= symbols[-1] < self.action_base:
+            inner = self.table[symbols[-1] - self.nonterminal_base][code]
+            if inner is None:
+                break
+            symbols.pop()
+            symbols.extend(inner)
+        return tuple(symbols)
+
+
+LL_TABLES = CompiledTables(generate())
+
+
+class LLParser(Parser):
+    """Парсер с тем же интерфейсом, что и Parser, но управляемый таблицей LL(1)."""
+    def __init__(self, tokens, text, optimize_passes=(), tables=LL_TABLES):
+        super().__init__(tokens, text, optimize_passes)
+        self.tables = tables
+        self.values = []
+        self.depth = 0
+        self.number_base = 0
+        self.target_token = None
+        # Количество ошибок перед правой частью Окончания (см. Parser.assign)
+        self.expression_errors = 0
+        self.stack = []
+        self._actions = [getattr(self, 'action_' + name) for name in tables.actions]
+
+    def fail(self, message, start, end):
+        self.report_error(message, start, end)
+        raise Exception("Fatal Error")
+
+    def lookahead(self):
+        code = self.peek_type()
+        return EOF_CODE if code is None else code
+
+    def parse_Lang(self):
+        tables = self.tables
+        table = tables.table
+        occurrence_codes = tables.occurrence_codes
+        nonterminal_base = tables.nonterminal_base
+        action_base = tables.action_base
+        actions = self._actions
+        values = self.values
+        # Числа блока Множ разбираются быстрым путём Parser.take_numbers;
+        # таблица нужна только для чисел, которые он не принял
+        num_symbol = tables.nonterminal_ids['Num']
+        num_list_symbol = tables.nonterminal_ids['NumList']
+
+        buffer = self._buffer
+        fill = self._fill
+
+        stack = self.stack
+        stack.append(tables.start_symbol)
+        code = self.lookahead()
+        while stack:
+            symbol = stack.pop()
+            if symbol < nonterminal_base:
+                if code != occurrence_codes[symbol]:
+                    self.mismatch_error(*tables.occurrence_owners[symbol])
+                # Терминал совпал, значит буфер не пуст: тройка забирается без peek/advance
+                item = self.last_item = buffer.popleft()
+                self.current_token_index += 1
+                values.append(item)
+                code = buffer[0][0] if buffer or fill(0) else EOF_CODE
+            elif symbol < action_base:
+                if code == NUMBER_CODE and (symbol == num_list_symbol or symbol == num_symbol):
+                    taken = self.take_numbers()
+                    if taken:
+                        code = buffer[0][0] if buffer or fill(0) else EOF_CODE
+                        if symbol == num_symbol:
+                            # Num принят, остальные числа поглотил бы следующий NumList
+                            continue
+                alternative = table[symbol - nonterminal_base][code]
+                if alternative is None:
+                    self.table_error(tables.nonterminals[symbol - nonterminal_base])
+                stack.extend(alternative)
+            else:
+                actions[symbol - action_base]()
+
+        if code != EOF_CODE:
+            tok = self.peek()
+            self.fail(f'После слова "End" присутствуют символы, найден "{tok.value}"', tok.start, tok.end)
+
+    # --- Сообщения об ошибках ---
+
+    def end_expected_error(self, tok):
+        if tok:
+            self.fail(f'Язык должен заканчиваться словом "End", найден "{tok.value}"', tok.start, tok.end)
+        start = self.last_token.end
+        self.fail('Язык должен заканчиваться словом "End"', start, start + 1)
+
+    def array_error(self, nonterminal, tok):
+        """Ошибка внутри блока Множ: токен, который не может продолжать число."""
+        if not tok or tok.type == 'KEYWORD_END':
+            tok = tok or self.last_token
+            self.fail(f'ожидался блок Окончание (начинается с переменной), но найден "{tok.value}"', tok.start, tok.end)
+        if tok.type == 'PUNCTUATION_COMMA':
+            if nonterminal == 'NumFrac':
+                int_part = self.values[-1]
+                self.fail('Комплексное число должно начинаться с вещественного числа', int_part[1], tok.end)
+            self.fail('Комплексное число не может начинаться с запятой', tok.start, tok.end)
+        if tok.type == 'PUNCTUATION_DOT':
+            self.fail('Неверный формат вещественного числа, перед "." ожидалось цел', tok.start, tok.end)
+        self.fail(f"В блоке 'Array' ожидалось число, но найдено '{tok.value}'", tok.start, tok.end)
+
+    def expression_error(self, tok):
+        """Ошибка в начале блока3: ожидалось значение."""
+        last = self.last_token
+        after_operator = last.type in OPERATOR_TYPES
+        if not tok:
+            if after_operator:
+                self.fail(f'После арифметического оператора "{last.value}" нет вещественного числа.', last.start, last.end)
+            self.end_expected_error(None)
+        if tok.type in INVALID_BRACKET_TYPES:
+            self.fail(f"использование скобок '{tok.value}' не допускается, используйте '[]'", tok.start, tok.end)
+        if tok.type == 'PUNCTUATION_DOT':
+            self.fail('Неверный формат вещественного числа, перед "." ожидалось цел', tok.start, tok.end)
+        if last.type == 'PUNCTUATION_EQUALS' and tok.type in OPERATOR_TYPES:
+            self.fail(f'Перед арифметическим оператором "{tok.value}" нет вещественного числа.', tok.start, tok.end)
+        if after_operator and tok.type in ('KEYWORD_END', 'PUNCTUATION_RBRACKET'):
+            self.fail(f'После арифметического оператора "{last.value}" нет вещественного числа.', last.start, last.end)
+        if after_operator and tok.type in OPERATOR_TYPES:
+            self.fail(f'Не могут следовать два оператора подряд ("{last.value}" и "{tok.value}").', last.start, tok.end)
+        self.fail(f"неожиданный токен '{tok.value}' в выражении", tok.start, tok.end)
+
+    def tail_error(self, tok):
+        """Ошибка после значения: ожидался оператор, "]" или "End"."""
+        if not tok:
+            if self.depth > 0:
+                self.fail('отсутствует закрывающая скобка "]"', self.last_token.start, self.last_token.end)
+            self.complete_expression()
+            self.end_expected_error(None)
+        if tok.type == 'PUNCTUATION_COMMA' and self.last_token.type == 'NUMBER':
+            # Последний литерал лежит на правом краю дерева выражения
+            node = self.values[-1]
+            while not isinstance(node, Num):
+                node = node.operand if isinstance(node, Neg) else node.right
+            self.fail('в выражении допускаются только вещественные числа', node.start, tok.end)
+        if tok.type == 'IDENTIFIER' and self.peek_type(1) == TYPE_CODES['PUNCTUATION_EQUALS']:
+            self.complete_expression()
+            self.fail("блок Окончание может быть только один раз", tok.start, tok.end)
+        if tok.type in ('IDENTIFIER', 'NUMBER', 'PUNCTUATION_LBRACKET'):
+            self.fail('Отсутствует арифметический оператор между', self.last_token.end, tok.start)
+        if self.depth > 0:
+            self.fail('отсутствует закрывающая скобка "]"', tok.start, tok.end)
+        self.complete_expression()
+        self.end_expected_error(tok)
+
+    def complete_expression(self):
+        """
+        Завершает выражение Окончания так, как если бы оно закончилось на текущем
+        токене: оставшиеся хвостовые нетерминалы раскрываются в ε, действия
+        выполняются вплоть до @assign. Как и Parser, значение переменной
+        вычисляется до сообщения об ошибке, найденной после выражения.
+        """
+        tables = self.tables
+        stack = self.stack
+        while stack:
+            symbol = stack.pop()
+            if symbol >= tables.action_base:
+                action = tables.actions[symbol - tables.action_base]
+                self._actions[symbol - tables.action_base]()
+                if action == 'assign':
+                    return
+            elif symbol < tables.nonterminal_base or symbol not in tables.nullable:
+                return
+
+    def table_error(self, nonterminal):
+        """В таблице нет правила для пары (нетерминал, текущий токен)."""
+        tok = self.peek()
+        if nonterminal == 'Lang':
+            self.mismatch_error('Lang', 'KEYWORD_START')
+        if nonterminal == 'Mnozh':
+            if tok:
+                self.fail(f'Не обнаружен блок Множ. Блок Множ должен начинаться со слова "Array", найден "{tok.value}"', tok.start, tok.end)
+            start = self.last_token.end
+            self.fail('Не обнаружен блок Множ. Блок Множ должен начинаться со слова "Array"', start, start + 1)
+        if nonterminal == 'Num':
+            if tok and tok.type in ('PUNCTUATION_DOT', 'PUNCTUATION_COMMA'):
+                self.array_error(nonterminal, tok)
+            pos = self.last_token.end
+            self.fail('после "Array" должно следовать хотя бы одно число', pos, pos + 1)
+        if nonterminal in ARRAY_NONTERMINALS:
+            self.array_error(nonterminal, tok)
+        if nonterminal == 'SignedAtom':
+            # После унарного знака
+            tok = tok or self.last_token
+            if tok.type == 'PUNCTUATION_DOT':
+                self.fail('Неверный формат вещественного числа, перед "." ожидалось цел', tok.start, tok.end)
+            self.fail(f"неожиданный токен '{tok.value}' в выражении", tok.start, tok.end)
+        if nonterminal in EXPRESSION_NONTERMINALS:
+            self.expression_error(tok)
+        if nonterminal in TAIL_NONTERMINALS:
+            self.tail_error(tok)
+        tok = tok or self.last_token
+        self.fail(f"неожиданный токен '{tok.value}'", tok.start, tok.end)
+
+    def mismatch_error(self, owner, expected):
+        """Текущий токен не совпал с терминалом, ожидаемым правилом owner."""
+        tok = self.peek()
+        if expected == 'KEYWORD_START':
+            if tok:
+                self.fail(f'Язык должен начинаться словом "Start", найден "{tok.value}"', tok.start, tok.end)
+            self.fail('Язык должен начинаться словом "Start"', 0, 1)
+        if expected == 'KEYWORD_END':
+            if tok and tok.type == 'PUNCTUATION_RBRACKET':
+                self.fail('отсутствует открывающая скобка "["', tok.start, tok.end)
+            self.end_expected_error(tok)
+        if expected == 'PUNCTUATION_EQUALS':
+            var_token = self.target_token
+            self.fail(f'Отсутствует "=" после переменной "{var_token.value}"', var_token.end, var_token.end + 1)
+        if owner == 'NumFrac':
+            int_part, dot_item = self.values[-2], self.values[-1]
+            self.fail('Вещественное число не может заканчиваться точкой. Ожидалась цифра после "."', int_part[1], dot_item[2])
+        if owner == 'NumKompl':
+            self.complex_error()
+        if owner == 'Atom' and expected == 'PUNCTUATION_DOT':
+            number = self.values[-1]
+            self.fail('в выражении допускаются только вещественные числа (например, 7.0)', number[1], number[2])
+        if owner == 'Atom' and expected == 'NUMBER':
+            dot_end = self.values[-1][2]
+            self.fail('Неверный формат вещественного числа, после "." ожидалось цел', dot_end, dot_end + 1)
+        if expected == 'PUNCTUATION_RBRACKET':
+            tok = tok or self.last_token
+            self.fail('отсутствует закрывающая скобка "]"', tok.start, tok.end)
+        tok = tok or self.last_token
+        self.fail(f"неожиданный токен '{tok.value}'", tok.start, tok.end)
+
+    def complex_error(self):
+        """Неверная мнимая часть комплексного числа в блоке Множ."""
+        values = self.values
+        frac_part = values[self.number_base + 2]
+        comma_item = values[self.number_base + 3]
+        if comma_item[1] != frac_part[2]:
+            self.fail('Комплексное число не может начинаться с запятой', comma_item[1], comma_item[2])
+        after_comma = values[self.number_base + 4] if len(values) > self.number_base + 4 else (self.peek_item() or self.last_item)
+        self.fail('Неверный формат комплексного числа, после "," ожидалось вещественное число (например, 1.2)', comma_item[1], after_comma[2])
+
+    # --- Семантические действия ---
+    # В values лежат тройки (код, начало, конец) поглощённых токенов и узлы выражения;
+    # Token строится только для имён переменных и сообщений об ошибках.
+
+    def action_array(self):
+        self._block = ArrayBlockBuilder(self.values.pop()[1], self.text)
+
+    def action_array_end(self):
+        self.arrays.append(self._block.build(self.last_item[2]))
+        self._block = None
+
+    def action_int(self):
+        self.number_base = len(self.values) - 1
+        self.check_octal(self.values[-1])
+
+    def action_real(self):
+        int_part, dot_item, frac_part = self.values[-3:]
+        if frac_part[1] != dot_item[2]:
+            self.fail('Вещественное число не может заканчиваться точкой. Ожидалась цифра после "."', int_part[1], dot_item[2])
+        self.check_octal(frac_part)
+
+    def action_complex(self):
+        frac_part, comma_item, imag_int, imag_dot, imag_frac = self.values[-5:]
+        if comma_item[1] != frac_part[2]:
+            self.fail('Комплексное число не может начинаться с запятой', comma_item[1], comma_item[2])
+        if not (imag_int[1] == comma_item[2] and imag_dot[1] == imag_int[2] and imag_frac[1] == imag_dot[2]):
+            self.complex_error()
+        self.check_octal(imag_int)
+        self.check_octal(imag_frac)
+
+    def action_number(self):
+        parts = self.values[self.number_base:]
+        kind = KIND_INT if len(parts) == 1 else KIND_REAL if len(parts) == 3 else KIND_COMPLEX
+        self._block.add_parts(kind, parts)
+        del self.values[self.number_base:]
+
+    def action_target(self):
+        var_token = self._make_token(self.values.pop())
+        self.target_token = var_token
+        if not re.fullmatch(r'[A-Za-z]{2}[0-7]{3}', var_token.value):
+            self.fail('переменная должна именоваться так: "буква буква цифра цифра цифра" (цифры от 0 до 7)', var_token.start, var_token.end)
+        self.symbols.declare(var_token.value)
+        self.expression_errors = len(self.errors)
+
+    def action_assign(self):
+        expression = self.values.pop()
+        self.values.pop()
+        self.assign(self.target_token, expression, poisoned=len(self.errors) > self.expression_errors)
+
+    def action_var(self):
+        _, start, end = self.values.pop()
+        name = token_text(self.text, start, end)
+        slot = self.symbols.resolve(name)
+        if slot is None:
+            self.report_error(f"Ошибка: переменная '{name}' не объявлена", start, end)
+            self.values.append(Num(0, start, end))
+        else:
+            self.values.append(Var(name, start, end, slot))
+
+    def action_real_literal(self):
+        frac_part = self.values.pop()
+        self.values.pop()
+        int_part = self.values.pop()
+        literal = f"{self.item_text(int_part)}.{self.item_text(frac_part)}"
+        try:
+            value = octal_str_to_float(literal)
+        except ValueError:
+            self.report_error(f'Неверный формат числа "{literal}" (ожидались восьмеричные цифры от 0 до 7 включительно)', int_part[1], frac_part[2])
+            value = 0.0
+        self.values.append(Num(value, int_part[1], frac_part[2]))
+
+    def action_negate(self):
+        node = self.values.pop()
+        minus_item = self.values.pop()
+        self.values.append(Neg(node, minus_item[1], self.last_item[2]))
+
+    def action_plus(self):
+        node = self.values.pop()
+        self.values.pop()
+        self.values.append(node)
+
+    def action_open(self):
+        bracket_item = self.values.pop()
+        if self.depth >= 2:
+            self.fail("глубина вложенности скобок не может превышать 2", bracket_item[1], bracket_item[2])
+        self.depth += 1
+
+    def action_close(self):
+        self.values.pop()
+        self.depth -= 1
+
+    def action_binary(self):
+        right = self.values.pop()
+        op_item = self.values.pop()
+        left = self.values.pop()
+        self.values.append(BinOp(OPERATOR_TEXT[op_item[0]], left, right, left.start, self.last_item[2], op_item[1]))
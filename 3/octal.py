@@ -0,0 +1,86 @@
+"""
+Точное и быстрое преобразование восьмеричных чисел.
+
+decode — строка "цел" или "цел.цел" в float: вся строка цифр переводится
+целочисленной арифметикой и делится на степень восьми, результат округляется
+один раз (корректно).
+encode — число в восьмеричную строку: цифры берутся тройками бит из
+точного представления float (мантисса / степень двойки). Дробная часть
+обрезается до MAX_FRACTION_DIGITS цифр, как и прежде в format_value.
+"""
+import math
+import re
+from array import array
+from functools import lru_cache
+
+MAX_FRACTION_DIGITS = 15
+
+# Размер кэша для повторяющихся литералов и значений
+CACHE_SIZE = 1024
+
+OCTAL_LITERAL = re.compile(r'[0-7]+(?:\.[0-7]*)?')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def decode(oct_str):
+    """Преобразует восьмеричную строку (возможно, с дробной частью) в float."""
+    if not OCTAL_LITERAL.fullmatch(oct_str):
+        raise ValueError(f"Неверная восьмеричная запись '{oct_str}'")
+    integer_digits, _, fraction_digits = oct_str.partition('.')
+    numerator = int(integer_digits + fraction_digits, 8)
+    return numerator / (1 << (3 * len(fraction_digits)))
+
+
+def _encode_float(value):
+    if math.isnan(value):
+        return 'nan'
+    if value < 0:
+        return '-' + _encode_float(-value)
+    if math.isinf(value):
+        return 'inf'
+
+    numerator, denominator = value.as_integer_ratio()
+    integer_part, remainder = divmod(numerator, denominator)
+    if not remainder:
+        return format(integer_part, 'o')
+
+    # Знаменатель — степень двойки: дополняем число бит до кратного трём
+    shift = denominator.bit_length() - 1
+    padding = -shift % 3
+    digit_count = (shift + padding) // 3
+    digits = format(remainder << padding, 'o').rjust(digit_count, '0').rstrip('0')
+    if len(digits) > MAX_FRACTION_DIGITS:
+        digits = digits[:MAX_FRACTION_DIGITS]
+    return f"{format(integer_part, 'o')}.{digits}"
+
+
+@lru_cache(maxsize=CACHE_SIZE, typed=True)
+def encode(value):
+    """Форматирует числовое значение (int, float или complex) в восьмеричную строку."""
+    if isinstance(value, complex):
+        return f"{_encode_float(value.real)},{_encode_float(value.imag)}"
+    if isinstance(value, float):
+        return _encode_float(value)
+    if value < 0:
+        return '-' + format(-int(value), 'o')
+    return format(int(value), 'o')
+
+
+def decode_many(oct_strings):
+    """
+    Пакетное декодирование в array('d') (колонки columns.ArrayBlock);
+    не помещающееся во float число даёт inf.
+    """
+    result = array('d')
+    append = result.append
+    for oct_str in oct_strings:
+        try:
+            append(decode(oct_str))
+        except OverflowError:
+            append(math.inf)
+    return result
+
+
+def encode_many(values):
+    """Пакетное кодирование: возвращает список строк."""
+    return list(map(encode, values))
@@ -0,0 +1,193 @@
+"""
+Оптимизирующие проходы над деревом выражения блока Окончание.
+
+- 'fold'     — свёртка поддеревьев, состоящих только из литералов;
+- 'strength' — замена x ** n (n целое от 2 до MAX_POWER) умножениями;
+- 'cse'      — слияние структурно одинаковых подвыражений (hash-consing),
+               результат — DAG, который compile_expression вычисляет без повторов.
+
+Операции, которые при вычислении дают ошибку (деление на ноль, переполнение),
+не сворачиваются и остаются в дереве, чтобы ошибка указывала на исходную позицию.
+"""
+from expr import BinOp, Neg, Num, Var, postorder
+
+OPTIMIZATION_PASSES = ('fold', 'strength', 'cse')
+
+# Наибольшая степень, заменяемая умножениями. Для степеней выше 2 результат
+# может отличаться от x ** n в последнем знаке из-за промежуточных округлений.
+MAX_POWER = 4
+
+
+class OptimizationReport:
+    """Количество узлов до и после каждого выполненного прохода."""
+    def __init__(self, nodes_before):
+        self.nodes_before = nodes_before
+        self.passes = []
+
+    @property
+    def nodes_after(self):
+        return self.passes[-1][2] if self.passes else self.nodes_before
+
+    def add(self, name, before, after):
+        self.passes.append((name, before, after))
+
+    def __str__(self):
+        lines = [f"Узлов до оптимизации: {self.nodes_before}"]
+        for name, before, after in self.passes:
+            lines.append(f"  {name}: {before} -> {after}")
+        lines.append(f"Узлов после оптимизации: {self.nodes_after}")
+        return "\n".join(lines)
+
+
+def count_nodes(root):
+    """Считает уникальные узлы дерева (общие подвыражения DAG учитываются один раз)."""
+    seen = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, BinOp):
+            stack.append(node.left)
+            stack.append(node.right)
+        elif isinstance(node, Neg):
+            stack.append(node.operand)
+    return len(seen)
+
+
+def _apply(op, left, right):
+    if op == '+':
+        return left + right
+    if op == '-':
+        return left - right
+    if op == '*':
+        return left * right
+    if op == '/':
+        return left / right
+    return left ** right
+
+
+def _rewrite(root, rewrite_operation):
+    """
+    Перестраивает дерево снизу вверх без рекурсии. rewrite_operation(node, left, right)
+    получает узел Neg или BinOp и уже перестроенные потомки (для Neg — operand и None)
+    и возвращает новый узел. Литералы и переменные остаются как есть.
+    """
+    done = {}
+    for node in postorder(root):
+        if isinstance(node, Neg):
+            result = rewrite_operation(node, done[id(node.operand)], None)
+        elif isinstance(node, BinOp):
+            result = rewrite_operation(node, done[id(node.left)], done[id(node.right)])
+        else:
+            result = node
+        done[id(node)] = result
+    return done[id(root)]
+
+
+def _fold_operation(node, left, right):
+    if isinstance(node, Neg):
+        if isinstance(left, Num):
+            return Num(-left.value, node.start, node.end)
+        return Neg(left, node.start, node.end)
+
+    if isinstance(left, Num) and isinstance(right, Num):
+        if not (node.op == '/' and right.value == 0):
+            try:
+                return Num(_apply(node.op, left.value, right.value), node.start, node.end)
+            except (ArithmeticError, ValueError):
+                pass
+    return BinOp(node.op, left, right, node.start, node.end, node.op_start)
+
+
+def fold_constants(node):
+    """Сворачивает поддеревья, состоящие только из литералов."""
+    return _rewrite(node, _fold_operation)
+
+
+def _reduce_operation(node, left, right):
+    if isinstance(node, Neg):
+        return Neg(left, node.start, node.end)
+
+    if node.op == '**' and isinstance(right, Num) and isinstance(right.value, float):
+        exponent = right.value
+        if exponent.is_integer() and 2 <= exponent <= MAX_POWER:
+            # Основание — один и тот же узел, поэтому при вычислении DAG оно считается один раз
+            result = left
+            for _ in range(int(exponent) - 1):
+                result = BinOp('*', result, left, node.start, node.end, node.op_start)
+            return result
+    return BinOp(node.op, left, right, node.start, node.end, node.op_start)
+
+
+def reduce_strength(node):
+    """Заменяет возведение в малую целую степень умножениями: x ** 3.0 -> x * x * x."""
+    return _rewrite(node, _reduce_operation)
+
+
+def eliminate_common_subexpressions(root):
+    """
+    Сливает структурно одинаковые подвыражения (hash-consing).
+    Остаётся первое слева вхождение, поэтому позиции ошибок не меняются.
+    """
+    table = {}
+    done = {}
+    for node in postorder(root):
+        if isinstance(node, Num):
+            # repr различает 0.0 и -0.0, которые равны при сравнении
+            key = ('num', type(node.value), repr(node.value))
+            result = table.setdefault(key, node)
+        elif isinstance(node, Var):
+            result = table.setdefault(('var', node.name), node)
+        elif isinstance(node, Neg):
+            operand = done[id(node.operand)]
+            key = ('neg', id(operand))
+            result = table.get(key)
+            if result is None:
+                result = table[key] = Neg(operand, node.start, node.end)
+        else:
+            left = done[id(node.left)]
+            right = done[id(node.right)]
+            key = (node.op, id(left), id(right))
+            result = table.get(key)
+            if result is None:
+                result = table[key] = BinOp(node.op, left, right, node.start, node.end, node.op_start)
+        done[id(node)] = result
+    return done[id(root)]
+
+
+PASS_FUNCTIONS = {
+    'fold': fold_constants,
+    'strength': reduce_strength,
+    'cse': eliminate_common_subexpressions,
+}
+
+
+def check_passes(passes):
+    """
+    Проверяет имена проходов оптимизации и возвращает их кортежем; строка вместо
+    последовательности имён или неизвестное имя — ValueError.
+    """
+    if isinstance(passes, str):
+        raise ValueError(f"Проходы оптимизации задаются последовательностью имён, а не строкой '{passes}'")
+    passes = tuple(passes)
+    unknown = set(passes) - set(OPTIMIZATION_PASSES)
+    if unknown:
+        raise ValueError(f"Неизвестные проходы оптимизации: {', '.join(sorted(map(str, unknown)))}")
+    return passes
+
+
+def optimize(root, passes=OPTIMIZATION_PASSES):
+    """
+    Применяет выбранные проходы в порядке OPTIMIZATION_PASSES.
+    Возвращает оптимизированное дерево и OptimizationReport.
+    """
+    passes = check_passes(passes)
+    report = OptimizationReport(count_nodes(root))
+    for name in OPTIMIZATION_PASSES:
+        if name in passes:
+            before = count_nodes(root)
+            root = PASS_FUNCTIONS[name](root)
+            report.add(name, before, count_nodes(root))
+    return root, report
@@ -1,82 +1,257 @@
-import math
 import re
+from collections import deque
+from itertools import islice
+
+import lineindex
+import octal
+from columns import KIND_COMPLEX, KIND_INT, KIND_REAL, ArrayBlockBuilder
+from expr import BinOp, EvaluationError, Neg, Num, Var, compile_expression
+from lexer import TOKEN_TYPES, TYPE_CODES, Token, TokenStream, token_text
+from symbols import SymbolTable
 
 # --- Вспомогательные функции для работы с восьмеричными числами ---
 
 def octal_str_to_float(oct_str):
     """Преобразует восьмеричную строку (возможно, с дробной частью) в float."""
-    if '.' in oct_str:
-        integer_part_str, fractional_part_str = oct_str.split('.')
-        integer_part = int(integer_part_str, 8)
-        fractional_part = 0.0
-        for i, digit in enumerate(fractional_part_str):
-            fractional_part += int(digit, 8) * (8 ** -(i + 1))
-        return float(integer_part) + fractional_part
-    else:
-        return float(int(oct_str, 8))
+    return octal.decode(oct_str)
 
 def format_value(value):
     """Форматирует числовое значение в восьмеричную строку для вывода."""
-    if isinstance(value, complex):
-        return f"{format_value(value.real)},{format_value(value.imag)}"
-    if isinstance(value, float):
-        if value < 0:
-            return "-" + format_value(abs(value))
-        integer_part = int(value)
-        fractional_part = value - integer_part
-        
-        oct_integer = oct(integer_part)[2:]
-        
-        if fractional_part == 0:
-            return oct_integer
-            
-        oct_fractional = []
-        for _ in range(15):
-            fractional_part *= 8
-            digit = int(fractional_part)
-            oct_fractional.append(str(digit))
-            fractional_part -= digit
-            if fractional_part == 0:
-                break
-        return f"{oct_integer}.{''.join(oct_fractional)}"
-    if value < 0:
-        return '-' + oct(abs(int(value)))[2:]
-    return oct(int(value))[2:]
+    return octal.encode(value)
+
+
+# Целочисленные коды типов токенов, используемые в горячих проверках парсера
+ARRAY_STOP_CODES = frozenset(TYPE_CODES[name] for name in ('KEYWORD_ARRAY', 'KEYWORD_END', 'IDENTIFIER'))
+ADD_CODES = frozenset(TYPE_CODES[name] for name in ('OPERATOR_PLUS', 'OPERATOR_MINUS'))
+MUL_CODES = frozenset(TYPE_CODES[name] for name in ('OPERATOR_MULTIPLY', 'OPERATOR_DIVIDE'))
+POWER_CODE = TYPE_CODES['OPERATOR_POWER']
+PLUS_CODE = TYPE_CODES['OPERATOR_PLUS']
+MINUS_CODE = TYPE_CODES['OPERATOR_MINUS']
+MULTIPLY_CODE = TYPE_CODES['OPERATOR_MULTIPLY']
+NUMBER_CODE = TYPE_CODES['NUMBER']
+DOT_CODE = TYPE_CODES['PUNCTUATION_DOT']
+COMMA_CODE = TYPE_CODES['PUNCTUATION_COMMA']
+ARRAY_CODE = TYPE_CODES['KEYWORD_ARRAY']
+END_CODE = TYPE_CODES['KEYWORD_END']
+IDENTIFIER_CODE = TYPE_CODES['IDENTIFIER']
+EQUALS_CODE = TYPE_CODES['PUNCTUATION_EQUALS']
+LBRACKET_CODE = TYPE_CODES['PUNCTUATION_LBRACKET']
+RBRACKET_CODE = TYPE_CODES['PUNCTUATION_RBRACKET']
+NUMBER_START_CODES = frozenset((NUMBER_CODE, DOT_CODE, COMMA_CODE))
+INVALID_BRACKET_CODES = frozenset(TYPE_CODES[name] for name in ('INVALID_LPAREN', 'INVALID_RPAREN', 'INVALID_LBRACE', 'INVALID_RBRACE'))
+# После оператора не может идти другой оператор, "End" или "]"
+NOT_OPERAND_CODES = ADD_CODES | MUL_CODES | frozenset((POWER_CODE, END_CODE, RBRACKET_CODE))
+# Значение, после которого пропущен оператор
+OPERAND_START_CODES = frozenset((IDENTIFIER_CODE, NUMBER_CODE, LBRACKET_CODE))
+
+# Токены, на которых разбор продолжается после ошибки в режиме восстановления
+END_SYNC_CODES = frozenset((END_CODE,))
+
+# Предел количества ошибок в режиме восстановления
+DEFAULT_MAX_ERRORS = 100
+
+# Максимальная глубина предпросмотра, которая нужна грамматике (peek(0..2) в parse_Mnozh_kompl)
+LOOKAHEAD = 3
+
+# Сколько токенов вытягивается из источника за одно обращение
+READ_AHEAD = 1024
+
+# Токенов в самом длинном числе блока Множ: компл = цел "." цел "," цел "." цел
+NUMBER_TOKENS = 7
+
+# Корректные числа блока Множ, записанные без пробелов (проверка быстрого пути)
+OCTAL_INT = re.compile(r'[0-7]+')
+OCTAL_REAL = re.compile(r'[0-7]+\.[0-7]+')
+OCTAL_COMPLEX = re.compile(r'[0-7]+\.[0-7]+,[0-7]+\.[0-7]+')
+# Те же проверки для байтовых источников (bytes, mmap)
+OCTAL_PATTERNS_BYTES = tuple(re.compile(pattern.pattern.encode('ascii'))
+                             for pattern in (OCTAL_INT, OCTAL_REAL, OCTAL_COMPLEX))
+
+
+class ErrorLimitReached(Exception):
+    """Набрано max_errors ошибок: разбор в режиме восстановления прекращается."""
 
 
 class Parser:
-    def __init__(self, tokens, text):
-        self.tokens = tokens
+    """
+    Синтаксический анализатор. Принимает список Token, TokenStream или итератор
+    троек (код, начало, конец), например Lexer.iter_codes(). Токены вытягиваются
+    из источника по мере необходимости пачками по READ_AHEAD в ограниченный буфер
+    предпросмотра, поэтому после фатальной ошибки остаток входа не читается.
+    optimize_passes — проходы оптимизатора выражения (см. optimizer.OPTIMIZATION_PASSES),
+    по умолчанию выражение не оптимизируется.
+
+    По умолчанию разбор останавливается на первой ошибке. При recover=True
+    после ошибки парсер пропускает токены до точки синхронизации (следующее
+    число блока Множ, "Array", "перем =", "]" или "End") и продолжает, собирая
+    все независимые ошибки за один проход, но не больше max_errors; если предел
+    достигнут, последней добавляется заметка о том, что разбор остановлен (сверх
+    предела, так что ошибок становится max_errors + 1).
+    """
+    def __init__(self, tokens, text, optimize_passes=(), recover=False, max_errors=DEFAULT_MAX_ERRORS):
+        if isinstance(tokens, list):
+            tokens = TokenStream.from_tokens(tokens, text)
+        if isinstance(tokens, TokenStream):
+            tokens = zip(tokens.types, tokens.starts, tokens.ends)
+        self._source = iter(tokens)
+        self._buffer = deque()
         self.text = text
         self.current_token_index = 0
+        # Последний поглощённый токен тройкой (код, начало, конец); Token строится только для сообщений
+        self.last_item = None
         self.errors = []
-        self.symbol_table = {}
-        self.declared_variables = set()
+        self.symbols = SymbolTable()
+        # Дерево выражения блока Окончание и имя присваиваемой переменной
+        self.target = None
+        self.expression = None
+        if optimize_passes:
+            # Ошибка в настройке должна дойти до вызывающего, а не потеряться в parse()
+            from optimizer import check_passes
+            optimize_passes = check_passes(optimize_passes)
+        self.optimize_passes = tuple(optimize_passes)
+        self.optimization_report = None
+        # Числа блоков Множ в колоночном виде (columns.ArrayBlock), по одному на блок
+        self.arrays = []
+        self._block = None
+        self.recover = recover
+        self.max_errors = max_errors
 
     def report_error(self, message, start, end):
         self.errors.append((message, start, end))
+        if self.recover and len(self.errors) >= self.max_errors:
+            raise ErrorLimitReached(f"Достигнут предел в {self.max_errors} ошибок")
+
+    def recover_from(self, error):
+        """Пробрасывает ошибку дальше, если восстановление выключено или достигнут предел ошибок."""
+        if not self.recover or isinstance(error, ErrorLimitReached):
+            raise error
+
+    def synchronize(self, codes, assignment=False):
+        """Пропускает токены до токена с кодом из codes, а при assignment — и до "перем ="."""
+        while True:
+            code = self.peek_type()
+            if code is None or code in codes:
+                return
+            if assignment and code == IDENTIFIER_CODE and self.peek_type(1) == EQUALS_CODE:
+                return
+            self.next_item()
+
+    def skip_number(self, number_index):
+        """Пропускает остаток ошибочного числа блока Множ — токены, идущие к нему вплотную."""
+        if self.current_token_index == number_index:
+            self.advance()
+        while True:
+            item = self.peek_item()
+            if item is None or item[0] in ARRAY_STOP_CODES or item[1] != self.last_item[2]:
+                return
+            self.next_item()
+
+    def skip_to_closing_bracket(self):
+        """
+        Пропускает токены до парной "]" и поглощает её. Возвращает False, если
+        раньше встретились "End", "перем =" или конец входа.
+        """
+        depth = 0
+        while True:
+            code = self.peek_type()
+            if code is None or code == END_CODE or (code == IDENTIFIER_CODE and self.peek_type(1) == EQUALS_CODE):
+                return False
+            if code == LBRACKET_CODE:
+                depth += 1
+            elif code == RBRACKET_CODE:
+                if depth == 0:
+                    self.next_item()
+                    return True
+                depth -= 1
+            self.next_item()
+
+    @property
+    def line_index(self):
+        """Индекс начал строк разбираемого текста (см. lineindex)."""
+        return lineindex.line_index(self.text)
+
+    def error_locations(self):
+        """Ошибки в виде (сообщение, (строка, столбец) начала, (строка, столбец) конца)."""
+        index = self.line_index
+        return [(message, index.position(start), index.position(end)) for message, start, end in self.errors]
+
+    def _fill(self, offset):
+        """Дочитывает источник пачками по READ_AHEAD, пока в буфере не окажется токен со смещением offset."""
+        buffer = self._buffer
+        while len(buffer) <= offset:
+            size = len(buffer)
+            buffer.extend(islice(self._source, READ_AHEAD))
+            if len(buffer) == size:
+                return False
+        return True
+
+    def _make_token(self, item):
+        code, start, end = item
+        return Token(TOKEN_TYPES[code], token_text(self.text, start, end), start, end)
+
+    def item_text(self, item):
+        """Текст токена, заданного тройкой (код, начало, конец)."""
+        return token_text(self.text, item[1], item[2])
+
+    # Горячие пути разбора работают с тройками через peek_type, peek_item и next_item;
+    # peek, consume и advance строят Token и нужны для сообщений об ошибках.
+
+    def peek_type(self, offset=0):
+        """Возвращает код типа токена (или None за концом потока) без создания Token."""
+        if len(self._buffer) > offset or self._fill(offset):
+            return self._buffer[offset][0]
+        return None
+
+    def peek_item(self, offset=0):
+        """Возвращает тройку (код, начало, конец) токена или None за концом потока."""
+        if len(self._buffer) > offset or self._fill(offset):
+            return self._buffer[offset]
+        return None
+
+    def next_item(self):
+        """Поглощает текущий токен и возвращает его тройку (или None за концом потока)."""
+        if self._buffer or self._fill(0):
+            self.current_token_index += 1
+            item = self.last_item = self._buffer.popleft()
+            return item
+        return None
+
+    @property
+    def last_token(self):
+        """Последний поглощённый токен как Token (или None)."""
+        return None if self.last_item is None else self._make_token(self.last_item)
 
     def consume(self, *expected_types):
-        if self.current_token_index < len(self.tokens):
-            current_token = self.tokens[self.current_token_index]
-            if current_token.type in expected_types:
-                self.current_token_index += 1
-                return current_token
+        item = self.peek_item()
+        if item is not None and TOKEN_TYPES[item[0]] in expected_types:
+            return self._make_token(self.next_item())
         return None
 
     def peek(self, offset=0):
-        index = self.current_token_index + offset
-        if 0 <= index < len(self.tokens):
-            return self.tokens[index]
-        return None
+        item = self.peek_item(offset)
+        return None if item is None else self._make_token(item)
+
+    def advance(self):
+        """Поглощает текущий токен независимо от его типа."""
+        item = self.next_item()
+        return None if item is None else self._make_token(item)
 
     def parse(self):
         try:
             self.parse_Lang()
+        except ErrorLimitReached:
+            item = self.peek_item() or self.last_item
+            start, end = (item[1], item[2]) if item is not None else (0, 1)
+            self.errors.append((f"Достигнут предел в {self.max_errors} ошибок, разбор остановлен", start, end))
         except Exception:
             pass
         return self.symbol_table, self.errors
 
+    @property
+    def symbol_table(self):
+        """Отображение имя переменной -> значение, строится по запросу."""
+        return self.symbols.as_dict()
+
     def parse_Lang(self):
         start_token = self.peek()
         if not start_token or start_token.type != 'KEYWORD_START':
@@ -84,44 +259,70 @@ class Parser:
             end_pos = start_token.end if start_token else 1
             msg = f'Язык должен начинаться словом "Start", найден "{start_token.value}"' if start_token else 'Язык должен начинаться словом "Start"'
             self.report_error(msg, start_pos, end_pos)
-            raise Exception("Fatal Error")
-        self.consume('KEYWORD_START')
+            if not self.recover or start_token is None:
+                raise Exception("Fatal Error")
+            self.synchronize(ARRAY_STOP_CODES)
+        else:
+            self.consume('KEYWORD_START')
+        self.parse_Mnozh_blocks()
+        self.parse_Ending()
 
-        found_mnozh = False
-        while self.peek() and self.peek().type == 'KEYWORD_ARRAY':
+    def parse_Mnozh_blocks(self, found_mnozh=False):
+        """Разбирает подряд идущие блоки Множ; found_mnozh — уже разобран хотя бы один блок."""
+        while self.peek_type() == ARRAY_CODE:
             found_mnozh = True
-            self.parse_Mnozh()
+            try:
+                self.parse_Mnozh()
+            except Exception as error:
+                self.recover_from(error)
+                self.synchronize(ARRAY_STOP_CODES)
         
         if not found_mnozh:
             next_token = self.peek()
-            start = next_token.start if next_token else self.tokens[-1].end
+            start = next_token.start if next_token else self.last_token.end
             end = next_token.end if next_token else start + 1
             msg = f'Не обнаружен блок Множ. Блок Множ должен начинаться со слова "Array", найден "{next_token.value}"' if next_token else 'Не обнаружен блок Множ. Блок Множ должен начинаться со слова "Array"'
             self.report_error(msg, start, end)
-            raise Exception("Fatal Error")
-
+            if not self.recover:
+                raise Exception("Fatal Error")
+            self.synchronize(ARRAY_STOP_CODES)
+            if self.peek_type() == ARRAY_CODE:
+                self.parse_Mnozh_blocks(found_mnozh=True)
+
+    def parse_Ending(self):
+        """Разбирает блок Окончание, слово End и проверяет, что после End ничего нет."""
         next_token = self.peek()
         if next_token and next_token.type == 'IDENTIFIER':
-            self.parse_Okonch()
+            self.parse_Okonch_recovering()
         else:
-            tok = self.peek() or self.tokens[-1]
+            tok = self.peek() or self.last_token
             error_val = f'"{tok.value}"' if tok else "конец файла"
             self.report_error(f'ожидался блок Окончание (начинается с переменной), но найден {error_val}', tok.start, tok.end)
-            raise Exception("Fatal Error")
+            if not self.recover:
+                raise Exception("Fatal Error")
+            self.synchronize(END_SYNC_CODES, assignment=True)
+            if self.peek_type() == IDENTIFIER_CODE:
+                self.parse_Okonch_recovering()
         
-        if self.peek() and self.peek().type == 'IDENTIFIER':
+        while self.peek() and self.peek().type == 'IDENTIFIER':
             tok = self.peek()
             self.report_error("блок Окончание может быть только один раз", tok.start, tok.end)
-            raise Exception("Fatal Error")
+            if not self.recover:
+                raise Exception("Fatal Error")
+            self.parse_Okonch_recovering()
 
         end_token = self.peek()
         if not end_token or end_token.type != 'KEYWORD_END':
-            last_token = self.tokens[-1]
+            last_token = self.last_token
             start = end_token.start if end_token else last_token.end
             end = end_token.end if end_token else start + 1
             msg = f'Язык должен заканчиваться словом "End", найден "{end_token.value}"' if end_token else 'Язык должен заканчиваться словом "End"'
             self.report_error(msg, start, end)
-            raise Exception("Fatal Error")
+            if not self.recover:
+                raise Exception("Fatal Error")
+            self.synchronize(END_SYNC_CODES)
+            if self.peek_type() != END_CODE:
+                return
         
         self.consume('KEYWORD_END')
 
@@ -132,100 +333,155 @@ class Parser:
 
 
     def parse_Mnozh(self):
-        array_token = self.consume('KEYWORD_ARRAY')
-        if not self.peek() or self.peek().type not in ('NUMBER', 'PUNCTUATION_DOT', 'PUNCTUATION_COMMA'):
-            pos = array_token.end
+        array_item = self.next_item()
+        if self.peek_type() not in NUMBER_START_CODES:
+            pos = array_item[2]
             self.report_error('после "Array" должно следовать хотя бы одно число', pos, pos + 1)
             raise Exception("Empty Array block")
 
-        while self.peek() and self.peek().type not in ('KEYWORD_ARRAY', 'KEYWORD_END', 'IDENTIFIER'):
-            self.parse_Mnozh_num()
+        block = self._block = ArrayBlockBuilder(array_item[1], self.text)
+        while True:
+            self.take_numbers()
+            code = self.peek_type()
+            if code is None or code in ARRAY_STOP_CODES:
+                break
+
+            number_index = self.current_token_index
+            try:
+                self.parse_Mnozh_num()
+            except Exception as error:
+                self.recover_from(error)
+                self.skip_number(number_index)
+        self.arrays.append(block.build(self.last_item[2]))
+        self._block = None
+
+    def take_numbers(self):
+        """
+        Быстрый путь блока Множ: поглощает подряд идущие корректные числа,
+        проверяя каждое по тройкам буфера и одному регулярному выражению,
+        и записывает их позиции в текущий блок. Останавливается на первом
+        токене, который разбирает parse_Mnozh_num; возвращает количество чисел.
+        """
+        block = self._block
+        add_kind, add_start, add_end = block.kinds.append, block.starts.append, block.ends.append
+        buffer = self._buffer
+        text = self.text
+        if isinstance(text, str):
+            octal_int, octal_real, octal_complex = OCTAL_INT, OCTAL_REAL, OCTAL_COMPLEX
+        else:
+            octal_int, octal_real, octal_complex = OCTAL_PATTERNS_BYTES
+        count = 0
+        while (buffer or self._fill(0)) and buffer[0][0] == NUMBER_CODE and (len(buffer) >= NUMBER_TOKENS or self._fill(NUMBER_TOKENS - 1)):
+            next_code = buffer[1][0]
+            if next_code == DOT_CODE:
+                frac_end = buffer[2][2]
+                comma = buffer[3]
+                if comma[0] == COMMA_CODE and comma[1] == frac_end:
+                    taken, pattern, kind = NUMBER_TOKENS, octal_complex, KIND_COMPLEX
+                else:
+                    taken, pattern, kind = 3, octal_real, KIND_REAL
+            elif next_code != COMMA_CODE:
+                taken, pattern, kind = 1, octal_int, KIND_INT
+            else:
+                break
+            # Число запоминается позициями, колонки декодируются пакетно (см. columns)
+            start = buffer[0][1]
+            end = buffer[taken - 1][2]
+            if not pattern.fullmatch(text[start:end]):
+                break
+            add_kind(kind)
+            add_start(start)
+            add_end(end)
+            self.current_token_index += taken
+            self.last_item = buffer[taken - 1]
+            for _ in range(taken):
+                buffer.popleft()
+            count += 1
+        return count
+
+    def check_octal(self, item):
+        """Возвращает цифры токена NUMBER; если они не восьмеричные — ошибка."""
+        digits = self.item_text(item)
+        try:
+            int(digits, 8)
+        except ValueError:
+            self.report_error(f'Неверный формат числа "{digits}" (цифры от 0 до 7)', item[1], item[2])
+            raise Exception("Invalid octal number")
+        return digits
 
     def parse_Mnozh_num(self):
-        start_tok = self.peek()
-        
-        if start_tok.type == 'PUNCTUATION_COMMA':
-            self.report_error('Комплексное число не может начинаться с запятой', start_tok.start, start_tok.end)
+        start_item = self.peek_item()
+        code = start_item[0]
+
+        if code == COMMA_CODE:
+            self.report_error('Комплексное число не может начинаться с запятой', start_item[1], start_item[2])
             raise Exception("Invalid complex number start")
 
-        if start_tok.type == 'PUNCTUATION_DOT':
-            self.report_error('Неверный формат вещественного числа, перед "." ожидалось цел', start_tok.start, start_tok.end)
+        if code == DOT_CODE:
+            self.report_error('Неверный формат вещественного числа, перед "." ожидалось цел', start_item[1], start_item[2])
             raise Exception("Invalid real number start")
 
-        if start_tok.type != 'NUMBER':
-            self.report_error(f"В блоке 'Array' ожидалось число, но найдено '{start_tok.value}'", start_tok.start, start_tok.end)
+        if code != NUMBER_CODE:
+            self.report_error(f"В блоке 'Array' ожидалось число, но найдено '{self.item_text(start_item)}'", start_item[1], start_item[2])
             raise Exception("Unexpected token in Array block")
 
-        int_part = self.consume('NUMBER')
-        
-        try:
-            int(int_part.value, 8)
-        except ValueError:
-            self.report_error(f'Неверный формат числа "{int_part.value}" (цифры от 0 до 7)', int_part.start, int_part.end)
-            raise Exception("Invalid octal number")
+        int_item = self.next_item()
+        self.check_octal(int_item)
 
-        next_tok = self.peek()
-        if next_tok and next_tok.type == 'PUNCTUATION_DOT':
-            self.parse_Mnozh_vesch(int_part)
-        elif next_tok and next_tok.type == 'PUNCTUATION_COMMA':
-            self.report_error('Комплексное число должно начинаться с вещественного числа', int_part.start, next_tok.end)
+        next_code = self.peek_type()
+        if next_code == DOT_CODE:
+            self.parse_Mnozh_vesch(int_item)
+        elif next_code == COMMA_CODE:
+            self.report_error('Комплексное число должно начинаться с вещественного числа', int_item[1], self.peek_item()[2])
             raise Exception("Invalid complex number format")
+        else:
+            self._block.add_parts(KIND_INT, (int_item,))
+
+    def parse_Mnozh_vesch(self, int_item):
+        dot_item = self.next_item()
 
-    def parse_Mnozh_vesch(self, int_part):
-        dot_token = self.consume('PUNCTUATION_DOT')
-        
-        frac_part_candidate = self.peek()
-        
         # Проверяем, что дробная часть (если есть) не только существует и является числом,
         # но и СЛЕДУЕТ НЕПОСРЕДСТВЕННО за точкой, без пробелов.
-        if not frac_part_candidate or frac_part_candidate.type != 'NUMBER' or frac_part_candidate.start != dot_token.end:
-            self.report_error('Вещественное число не может заканчиваться точкой. Ожидалась цифра после "."', int_part.start, dot_token.end)
+        frac_item = self.peek_item()
+        if frac_item is None or frac_item[0] != NUMBER_CODE or frac_item[1] != dot_item[2]:
+            self.report_error('Вещественное число не может заканчиваться точкой. Ожидалась цифра после "."', int_item[1], dot_item[2])
             raise Exception("Incomplete real number")
 
-        frac_part = self.consume('NUMBER')
-        try:
-            int(frac_part.value, 8)
-        except ValueError:
-            self.report_error(f'Неверный формат числа "{frac_part.value}" (цифры от 0 до 7)', frac_part.start, frac_part.end)
-            raise Exception("Invalid octal number")
-        
+        self.next_item()
+        self.check_octal(frac_item)
+
         # Проверяем на комплексную часть, также с учетом смежности
-        comma_candidate = self.peek()
-        if comma_candidate and comma_candidate.type == 'PUNCTUATION_COMMA' and comma_candidate.start == frac_part.end:
-            self.parse_Mnozh_kompl(int_part, frac_part)
+        comma_item = self.peek_item()
+        if comma_item is not None and comma_item[0] == COMMA_CODE and comma_item[1] == frac_item[2]:
+            self.parse_Mnozh_kompl((int_item, dot_item, frac_item))
+        else:
+            self._block.add_parts(KIND_REAL, (int_item, dot_item, frac_item))
 
-    def parse_Mnozh_kompl(self, real_int_part, real_frac_part):
-        comma_token = self.consume('PUNCTUATION_COMMA')
+    def parse_Mnozh_kompl(self, real_parts):
+        comma_item = self.next_item()
+
+        imag_int = self.peek_item(0)
+        imag_dot = self.peek_item(1)
+        imag_frac = self.peek_item(2)
 
-        imag_int_tok = self.peek(0)
-        imag_dot_tok = self.peek(1)
-        imag_frac_tok = self.peek(2)
-        
         # Теперь проверяем не только тип токенов, но и их смежность (отсутствие пробелов)
         is_valid_and_contiguous = (
-            imag_int_tok and imag_int_tok.type == 'NUMBER' and imag_int_tok.start == comma_token.end and
-            imag_dot_tok and imag_dot_tok.type == 'PUNCTUATION_DOT' and imag_dot_tok.start == imag_int_tok.end and
-            imag_frac_tok and imag_frac_tok.type == 'NUMBER' and imag_frac_tok.start == imag_dot_tok.end
+            imag_int is not None and imag_int[0] == NUMBER_CODE and imag_int[1] == comma_item[2] and
+            imag_dot is not None and imag_dot[0] == DOT_CODE and imag_dot[1] == imag_int[2] and
+            imag_frac is not None and imag_frac[0] == NUMBER_CODE and imag_frac[1] == imag_dot[2]
         )
 
         if not is_valid_and_contiguous:
-            start_pos = comma_token.start
-            end_tok = self.peek() or self.tokens[-1]
-            self.report_error('Неверный формат комплексного числа, после "," ожидалось вещественное число (например, 1.2)', start_pos, end_tok.end)
+            end_item = self.peek_item() or self.last_item
+            self.report_error('Неверный формат комплексного числа, после "," ожидалось вещественное число (например, 1.2)', comma_item[1], end_item[2])
             raise Exception("Incomplete complex number")
-        
-        imag_int = self.consume('NUMBER')
-        self.consume('PUNCTUATION_DOT')
-        imag_frac = self.consume('NUMBER')
-        
-        try: int(imag_int.value, 8)
-        except ValueError:
-            self.report_error(f'Неверный формат числа "{imag_int.value}" (цифры от 0 до 7)', imag_int.start, imag_int.end)
-            raise Exception("Invalid octal number")
-        try: int(imag_frac.value, 8)
-        except ValueError:
-            self.report_error(f'Неверный формат числа "{imag_frac.value}" (цифры от 0 до 7)', imag_frac.start, imag_frac.end)
-            raise Exception("Invalid octal number")
+
+        self.next_item()
+        self.next_item()
+        self.next_item()
+        self.check_octal(imag_int)
+        self.check_octal(imag_frac)
+        self._block.add_parts(KIND_COMPLEX, real_parts + (comma_item, imag_int, imag_dot, imag_frac))
 
     def parse_num(self):
         start_tok = self.peek()
@@ -236,7 +492,7 @@ class Parser:
                 if self.peek() and self.peek().type == 'NUMBER' and self.peek(1) and self.peek(1).type == 'PUNCTUATION_DOT':
                     self.parse_vesch()
                 else:
-                    tok = self.peek() or self.tokens[-1]
+                    tok = self.peek() or self.last_token
                     self.report_error('Неверный формат комплексного числа, после "," ожидалось вещ', tok.start, tok.end)
                     raise Exception("Parsing Error: Incomplete complex number")
             return None
@@ -253,28 +509,38 @@ class Parser:
             return None
 
     def parse_vesch(self):
-        int_part = self.consume('NUMBER')
-        if not int_part:
-            tok = self.peek() or self.tokens[-1]
+        int_item = self.peek_item()
+        if int_item is None or int_item[0] != NUMBER_CODE:
+            tok = self.peek() or self.last_token
             self.report_error('Неверный формат вещественного числа, перед "." ожидалось цел', tok.start, tok.end)
             return 0.0
+        self.next_item()
 
-        dot = self.consume('PUNCTUATION_DOT')
-        if not dot:
-            self.report_error('Неверный формат вещественного числа, отсутствует "."', int_part.end, int_part.end + 1)
+        if self.peek_type() != DOT_CODE:
+            self.report_error('Неверный формат вещественного числа, отсутствует "."', int_item[2], int_item[2] + 1)
             return 0.0
-            
-        frac_part = self.consume('NUMBER')
-        if not frac_part:
-            self.report_error('Неверный формат вещественного числа, после "." ожидалось цел', dot.end, dot.end + 1)
+        dot_item = self.next_item()
+
+        if self.peek_type() != NUMBER_CODE:
+            self.report_error('Неверный формат вещественного числа, после "." ожидалось цел', dot_item[2], dot_item[2] + 1)
             raise Exception("Parsing Error: Incomplete real number")
-        
+        frac_item = self.next_item()
+
+        literal = f"{self.item_text(int_item)}.{self.item_text(frac_item)}"
         try:
-            return octal_str_to_float(f"{int_part.value}.{frac_part.value}")
+            return octal_str_to_float(literal)
         except ValueError:
-            self.report_error(f'Неверный формат числа "{int_part.value}.{frac_part.value}" (ожидались восьмеричные цифры от 0 до 7 включительно)', int_part.start, frac_part.end)
+            self.report_error(f'Неверный формат числа "{literal}" (ожидались восьмеричные цифры от 0 до 7 включительно)', int_item[1], frac_item[2])
             return 0.0
     
+    def parse_Okonch_recovering(self):
+        """Разбирает Окончание; в режиме восстановления после ошибки переходит к "End" или "перем ="."""
+        try:
+            self.parse_Okonch()
+        except Exception as error:
+            self.recover_from(error)
+            self.synchronize(END_SYNC_CODES, assignment=True)
+
     def parse_Okonch(self):
         var_token = self.consume('IDENTIFIER')
         if not var_token:
@@ -282,10 +548,11 @@ class Parser:
         
         if not re.fullmatch(r'[A-Za-z]{2}[0-7]{3}', var_token.value):
             self.report_error('переменная должна именоваться так: "буква буква цифра цифра цифра" (цифры от 0 до 7)', var_token.start, var_token.end)
-            raise Exception("Invalid variable format")
+            # Имя не влияет на разбор правой части, в режиме восстановления она тоже проверяется
+            if not self.recover:
+                raise Exception("Invalid variable format")
 
-        self.declared_variables.add(var_token.value)
-        self.symbol_table[var_token.value] = 0
+        self.symbols.declare(var_token.value)
 
         equals_token = self.consume('PUNCTUATION_EQUALS')
         if not equals_token:
@@ -297,156 +564,195 @@ class Parser:
             self.report_error(f'Перед арифметическим оператором "{next_tok.value}" нет вещественного числа.', next_tok.start, next_tok.end)
             raise Exception("Expression starts with invalid operator")
 
-        value = self.parse_Right_part(depth=0)
-        self.symbol_table[var_token.value] = value
+        errors_before = len(self.errors)
+        expression = self.parse_Right_part(depth=0)
+        self.assign(var_token, expression, poisoned=len(self.errors) > errors_before)
+
+    def assign(self, var_token, expression, poisoned=False):
+        """
+        Сохраняет дерево выражения Окончания и вычисляет значение переменной.
+        poisoned — в выражении уже найдены ошибки. В режиме восстановления вместо
+        ошибочных частей в дереве стоят заглушки Num(0), поэтому такое выражение
+        не вычисляется (иначе возможны ложные ошибки деления на ноль); в режиме
+        до первой ошибки сообщения остаются прежними.
+        """
+        self.expression = expression
+        self.target = var_token.value
+        if poisoned and self.recover:
+            return
+        if self.optimize_passes:
+            from optimizer import optimize
+            self.expression, self.optimization_report = optimize(self.expression, self.optimize_passes)
+        try:
+            value = compile_expression(self.expression)(self.symbols.values)
+        except EvaluationError as error:
+            self.report_error(error.message, error.start, error.end)
+            raise
+        self.symbols.declare(var_token.value, value)
+
+    def evaluate_arrays(self):
+        """
+        Вычисляет выражение Окончания поэлементно по каждому блоку Множ:
+        переменная Окончания принимает по очереди все числа блока.
+        Возвращает список векторов результатов (по одному на блок); деление
+        на ноль и переполнение сообщаются одной ошибкой на блок с номерами элементов.
+        Если при разборе были ошибки, ничего не вычисляется.
+        """
+        if self.expression is None or self.errors:
+            return []
+        from vectorized import VectorEvaluationError, evaluate_vectorized
+        slot = self.symbols.resolve(self.target)
+        results = []
+        for number, block in enumerate(self.arrays, 1):
+            env = list(self.symbols.values)
+            env[slot] = block.vector()
+            try:
+                values = evaluate_vectorized(self.expression, env, len(block))
+            except VectorEvaluationError as error:
+                results.append(error.values)
+                try:
+                    self.report_error(f"{error.message} (блок Множ {number})", error.start, error.end)
+                except ErrorLimitReached:
+                    break
+            else:
+                results.append(values)
+        return results
 
-    def check_missing_operator(self, last_token):
+    def check_missing_operator(self):
         """Проверяет наличие оператора после значения."""
-        next_tok = self.peek()
+        code = self.peek_type()
 
         # ИЗМЕНЕНИЕ: Если следующий токен - это начало нового присваивания (перем =),
         # то это не ошибка отсутствия оператора.
-        if next_tok and next_tok.type == 'IDENTIFIER' and self.peek(1) and self.peek(1).type == 'PUNCTUATION_EQUALS':
+        if code == IDENTIFIER_CODE and self.peek_type(1) == EQUALS_CODE:
             return
 
-        if next_tok and next_tok.type in ('IDENTIFIER', 'NUMBER', 'PUNCTUATION_LBRACKET'):
-            full_value = last_token.value
-            if hasattr(last_token, 'full_value_str'):
-                full_value = last_token.full_value_str
-
-            self.report_error(f'Отсутствует арифметический оператор между', last_token.end, next_tok.start)
+        if code in OPERAND_START_CODES:
+            self.report_error(f'Отсутствует арифметический оператор между', self.last_item[2], self.peek_item()[1])
             raise Exception("Missing operator")
 
+    def check_operand_after(self, op_item):
+        """Проверяет, что после оператора op_item идёт значение, а не оператор, "]" или "End"."""
+        code = self.peek_type()
+        if code is None or code in NOT_OPERAND_CODES:
+            op_text = self.item_text(op_item)
+            if code is None or code in (END_CODE, RBRACKET_CODE):
+                self.report_error(f'После арифметического оператора "{op_text}" нет вещественного числа.', op_item[1], op_item[2])
+            else:
+                next_item = self.peek_item()
+                self.report_error(f'Не могут следовать два оператора подряд ("{op_text}" и "{self.item_text(next_item)}").', op_item[1], next_item[2])
+            raise Exception("Parsing Error")
+
     def parse_Right_part(self, depth):
         result = self.parse_Blok1(depth)
-        while self.peek() and self.peek().type in ('OPERATOR_PLUS', 'OPERATOR_MINUS'):
-            op_token = self.consume('OPERATOR_PLUS', 'OPERATOR_MINUS')
-            
-            if not self.peek() or self.peek().type in ('OPERATOR_PLUS', 'OPERATOR_MINUS', 'OPERATOR_MULTIPLY', 'OPERATOR_DIVIDE', 'OPERATOR_POWER', 'KEYWORD_END', 'PUNCTUATION_RBRACKET'):
-                next_tok = self.peek()
-                if not next_tok or next_tok.type in ('KEYWORD_END', 'PUNCTUATION_RBRACKET'):
-                    self.report_error(f'После арифметического оператора "{op_token.value}" нет вещественного числа.', op_token.start, op_token.end)
-                else:
-                    self.report_error(f'Не могут следовать два оператора подряд ("{op_token.value}" и "{next_tok.value}").', op_token.start, next_tok.end)
-                raise Exception("Parsing Error")
-
+        while self.peek_type() in ADD_CODES:
+            op_item = self.next_item()
+            self.check_operand_after(op_item)
             right = self.parse_Blok1(depth)
-            if op_token.type == 'OPERATOR_PLUS':
-                result += right
-            else:
-                result -= right
-        
-            next_tok = self.peek()
-            if depth == 0 and next_tok and next_tok.type == 'PUNCTUATION_RBRACKET':
-                self.report_error('отсутствует открывающая скобка "["', next_tok.start, next_tok.end)
+            op = '+' if op_item[0] == PLUS_CODE else '-'
+            result = BinOp(op, result, right, result.start, self.last_item[2], op_item[1])
+
+            if depth == 0 and self.peek_type() == RBRACKET_CODE:
+                bracket = self.peek_item()
+                self.report_error('отсутствует открывающая скобка "["', bracket[1], bracket[2])
                 raise Exception("Unmatched closing bracket at top level")
         return result
 
     def parse_Blok1(self, depth):
         result = self.parse_Blok2(depth)
-        while self.peek() and self.peek().type in ('OPERATOR_MULTIPLY', 'OPERATOR_DIVIDE'):
-            op_token = self.consume('OPERATOR_MULTIPLY', 'OPERATOR_DIVIDE')
-
-            if not self.peek() or self.peek().type in ('OPERATOR_PLUS', 'OPERATOR_MINUS', 'OPERATOR_MULTIPLY', 'OPERATOR_DIVIDE', 'OPERATOR_POWER', 'KEYWORD_END', 'PUNCTUATION_RBRACKET'):
-                next_tok = self.peek()
-                if not next_tok or next_tok.type in ('KEYWORD_END', 'PUNCTUATION_RBRACKET'):
-                    self.report_error(f'После арифметического оператора "{op_token.value}" нет вещественного числа.', op_token.start, op_token.end)
-                else:
-                    self.report_error(f'Не могут следовать два оператора подряд ("{op_token.value}" и "{next_tok.value}").', op_token.start, next_tok.end)
-                raise Exception("Parsing Error")
-
+        while self.peek_type() in MUL_CODES:
+            op_item = self.next_item()
+            self.check_operand_after(op_item)
             right = self.parse_Blok2(depth)
-            if op_token.type == 'OPERATOR_MULTIPLY':
-                result *= right
-            else:
-                if right == 0:
-                    self.report_error('Ошибка: деление на ноль', op_token.start, self.tokens[self.current_token_index - 1].end)
-                    raise Exception("Division by zero")
-                result /= right
+            op = '*' if op_item[0] == MULTIPLY_CODE else '/'
+            result = BinOp(op, result, right, result.start, self.last_item[2], op_item[1])
         return result
 
     def parse_Blok2(self, depth):
         result = self.parse_Blok3(depth)
-        self.check_missing_operator(self.tokens[self.current_token_index - 1])
-
-        while self.peek() and self.peek().type == 'OPERATOR_POWER':
-            op_token = self.consume('OPERATOR_POWER')
-            
-            if not self.peek() or self.peek().type in ('OPERATOR_PLUS', 'OPERATOR_MINUS', 'OPERATOR_MULTIPLY', 'OPERATOR_DIVIDE', 'OPERATOR_POWER', 'KEYWORD_END', 'PUNCTUATION_RBRACKET'):
-                next_tok = self.peek()
-                if not next_tok or next_tok.type in ('KEYWORD_END', 'PUNCTUATION_RBRACKET'):
-                    self.report_error(f'После арифметического оператора "{op_token.value}" нет вещественного числа.', op_token.start, op_token.end)
-                else:
-                    self.report_error(f'Не могут следовать два оператора подряд ("{op_token.value}" и "{next_tok.value}").', op_token.start, next_tok.end)
-                raise Exception("Parsing Error")
+        self.check_missing_operator()
 
+        while self.peek_type() == POWER_CODE:
+            op_item = self.next_item()
+            self.check_operand_after(op_item)
             right = self.parse_Blok3(depth)
-            self.check_missing_operator(self.tokens[self.current_token_index - 1])
-            result **= right
+            self.check_missing_operator()
+            result = BinOp('**', result, right, result.start, self.last_item[2], op_item[1])
         return result
 
+    def apply_sign(self, sign_item, node):
+        """Оборачивает узел в унарный минус, если перед блоком3 стоял "-"."""
+        if sign_item is None:
+            return node
+        return Neg(node, sign_item[1], self.last_item[2])
+
     def parse_Blok3(self, depth):
-        token = self.peek()
+        item = self.peek_item()
+        code = item[0]
 
-       
-        if token.type in ('INVALID_LPAREN', 'INVALID_RPAREN', 'INVALID_LBRACE', 'INVALID_RBRACE'):
-            self.report_error(f"использование скобок '{token.value}' не допускается, используйте '[]'", token.start, token.end)
+        if code in INVALID_BRACKET_CODES:
+            self.report_error(f"использование скобок '{self.item_text(item)}' не допускается, используйте '[]'", item[1], item[2])
             raise Exception("Invalid bracket type")
 
-        sign = 1
-        if token.type in ('OPERATOR_PLUS', 'OPERATOR_MINUS'):
-            op_token = self.consume(token.type)
-            if op_token.type == 'OPERATOR_MINUS':
-                sign = -1
-            token = self.peek()
-
-        if token.type == 'IDENTIFIER':
-            var_token = self.consume('IDENTIFIER')
-            if var_token.value not in self.declared_variables:
-                self.report_error(f"Ошибка: переменная '{var_token.value}' не объявлена", var_token.start, var_token.end)
-                return 0
-            return self.symbol_table.get(var_token.value, 0) * sign
-
-        if token.type == 'NUMBER' and self.peek(1) and self.peek(1).type == 'PUNCTUATION_DOT':
-            start_num_token = token
+        sign_item = None
+        if code in ADD_CODES:
+            op_item = self.next_item()
+            if code == MINUS_CODE:
+                sign_item = op_item
+            item = self.peek_item()
+            code = item[0]
+
+        if code == IDENTIFIER_CODE:
+            self.next_item()
+            name = self.item_text(item)
+            slot = self.symbols.resolve(name)
+            if slot is None:
+                self.report_error(f"Ошибка: переменная '{name}' не объявлена", item[1], item[2])
+                return Num(0, item[1], item[2])
+            return self.apply_sign(sign_item, Var(name, item[1], item[2], slot))
+
+        if code == NUMBER_CODE and self.peek_type(1) == DOT_CODE:
             value = self.parse_vesch()
-            
-            if self.peek() and self.peek().type == 'PUNCTUATION_COMMA':
-                comma_token = self.peek()
+
+            if self.peek_type() == COMMA_CODE:
                 self.report_error(
                     'в выражении допускаются только вещественные числа',
-                    start_num_token.start, 
-                    comma_token.end
+                    item[1],
+                    self.peek_item()[2]
                 )
                 raise Exception("Complex number in expression")
 
-            end_num_token = self.tokens[self.current_token_index - 1]
-            end_num_token.full_value_str = self.text[start_num_token.start:end_num_token.end]
-            return value * sign
-        
-        if token.type == 'NUMBER':
-            self.report_error('в выражении допускаются только вещественные числа (например, 7.0)', token.start, token.end)
+            return self.apply_sign(sign_item, Num(value, item[1], self.last_item[2]))
+
+        if code == NUMBER_CODE:
+            self.report_error('в выражении допускаются только вещественные числа (например, 7.0)', item[1], item[2])
             raise Exception("Integer in expression")
 
-        if token.type == 'PUNCTUATION_LBRACKET':
+        if code == LBRACKET_CODE:
             if depth >= 2:
-                self.report_error("глубина вложенности скобок не может превышать 2", token.start, token.end)
+                self.report_error("глубина вложенности скобок не может превышать 2", item[1], item[2])
                 raise Exception("Nesting too deep")
-            self.consume('PUNCTUATION_LBRACKET')
-            result = self.parse_Right_part(depth + 1)
-            
-            if not self.peek() or self.peek().type != 'PUNCTUATION_RBRACKET':
-                tok = self.peek() or self.tokens[self.current_token_index-1]
-                self.report_error('отсутствует закрывающая скобка "]"', tok.start, tok.end)
-                raise Exception("Missing closing bracket")
-
-            bracket_token = self.consume('PUNCTUATION_RBRACKET')
-            bracket_token.full_value_str = f'[{result}]'
-            return result * sign
-
-        if token.type == 'PUNCTUATION_DOT':
-            self.report_error('Неверный формат вещественного числа, перед "." ожидалось цел', token.start, token.end)
+            self.next_item()
+            try:
+                result = self.parse_Right_part(depth + 1)
+
+                if self.peek_type() != RBRACKET_CODE:
+                    end_item = self.peek_item() or self.last_item
+                    self.report_error('отсутствует закрывающая скобка "]"', end_item[1], end_item[2])
+                    raise Exception("Missing closing bracket")
+            except Exception as error:
+                # Ошибка внутри скобок: продолжаем после парной "]", скобки дают нулевое значение
+                self.recover_from(error)
+                if not self.skip_to_closing_bracket():
+                    raise
+                return Num(0, item[1], self.last_item[2])
+
+            self.next_item()
+            return self.apply_sign(sign_item, result)
+
+        if code == DOT_CODE:
+            self.report_error('Неверный формат вещественного числа, перед "." ожидалось цел', item[1], item[2])
             raise Exception("Parsing Error: Real number starting with a dot")
-        
-        self.report_error(f"неожиданный токен '{token.value}' в выражении", token.start, token.end)
-        raise Exception("Parsing Error")
\ No newline at end of file
+
+        self.report_error(f"неожиданный токен '{self.item_text(item)}' в выражении", item[1], item[2])
+        raise Exception("Parsing Error")
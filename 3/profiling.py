@@ -0,0 +1,209 @@
+"""
+Необязательная инструментация трансляции: время фаз и счётчики горячих путей.
+
+translate(text, collect_stats=True) выполняет трансляцию через translate_with_stats
+и кладёт в TranslationResult.stats объект TranslationStats:
+- phases — время фаз: lex, parse (без вычисления), evaluate, format;
+- token_counts — количество токенов каждого типа;
+- peek_calls — обращения парсера к буферу предпросмотра (peek_type, peek_item),
+  consume_calls — поглощённые токены (в том числе быстрым путём блока Множ);
+- max_expression_depth / expression_nodes — глубина и размер дерева Окончания;
+- allocated_blocks — прирост числа выделенных блоков памяти по фазам
+  (sys.getallocatedblocks), а при trace_memory=True ещё и пик памяти по фазам
+  (tracemalloc, заметно замедляет трансляцию).
+
+Счётчики ведёт подкласс InstrumentedParser, поэтому без collect_stats обычный
+Parser и translate() не выполняют никакой лишней работы.
+run_profiled(path, function, ...) выполняет функцию под cProfile и сохраняет
+статистику в файл для pstats/snakeviz.
+"""
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+from expr import BinOp, Neg
+from lexer import TOKEN_TYPES, Lexer
+from parser import Parser, format_value
+from translator import TranslationResult, reached_lexer_errors
+
+PHASES = ('lex', 'parse', 'evaluate', 'format')
+
+
+class TranslationStats:
+    """Результаты инструментации одной трансляции (см. описание модуля)."""
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.token_counts = {}
+        self.peek_calls = 0
+        self.consume_calls = 0
+        self.max_expression_depth = 0
+        self.expression_nodes = 0
+        self.allocated_blocks = dict.fromkeys(PHASES, 0)
+        self.peak_kib = None
+
+    @property
+    def total(self):
+        return sum(self.phases.values())
+
+    @property
+    def token_count(self):
+        return sum(self.token_counts.values())
+
+    def as_dict(self):
+        return {
+            'phases': dict(self.phases),
+            'total': self.total,
+            'token_count': self.token_count,
+            'token_counts': dict(self.token_counts),
+            'peek_calls': self.peek_calls,
+            'consume_calls': self.consume_calls,
+            'max_expression_depth': self.max_expression_depth,
+            'expression_nodes': self.expression_nodes,
+            'allocated_blocks': dict(self.allocated_blocks),
+            'peak_kib': self.peak_kib,
+        }
+
+    def format(self):
+        """Многострочный отчёт для CLI и GUI."""
+        lines = [f"{'фаза':<10}{'мс':>10}{'блоки памяти':>14}" + ('' if self.peak_kib is None else f"{'пик, КиБ':>10}")]
+        for phase in PHASES:
+            line = f"{phase:<10}{self.phases[phase] * 1000:>10.3f}{self.allocated_blocks[phase]:>14}"
+            if self.peak_kib is not None:
+                line += f"{self.peak_kib[phase]:>10.1f}"
+            lines.append(line)
+        lines.append(f"{'всего':<10}{self.total * 1000:>10.3f}")
+        lines.append(f"токенов: {self.token_count}; peek: {self.peek_calls}; consume: {self.consume_calls}")
+        lines.append(f"дерево Окончания: {self.expression_nodes} узлов, глубина {self.max_expression_depth}")
+        if self.token_counts:
+            lines.append("по типам: " + ", ".join(f"{name} {count}" for name, count in
+                                                  sorted(self.token_counts.items(), key=lambda item: -item[1])))
+        return "\n".join(lines)
+
+
+class InstrumentedParser(Parser):
+    """Parser, считающий обращения к буферу токенов и время вычисления Окончания."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.peek_calls = 0
+        self.evaluate_seconds = 0.0
+        self.evaluate_blocks = 0
+
+    def peek_type(self, offset=0):
+        self.peek_calls += 1
+        return super().peek_type(offset)
+
+    def peek_item(self, offset=0):
+        self.peek_calls += 1
+        return super().peek_item(offset)
+
+    def assign(self, var_token, expression, poisoned=False):
+        blocks = sys.getallocatedblocks()
+        started = time.perf_counter()
+        try:
+            super().assign(var_token, expression, poisoned)
+        finally:
+            self.evaluate_seconds += time.perf_counter() - started
+            self.evaluate_blocks += sys.getallocatedblocks() - blocks
+
+
+def _children(node):
+    if isinstance(node, BinOp):
+        return (node.left, node.right)
+    if isinstance(node, Neg):
+        return (node.operand,)
+    return ()
+
+
+def expression_shape(root):
+    """
+    (глубина, количество узлов) дерева выражения без рекурсии; лист имеет глубину 1.
+    Общие подвыражения DAG после оптимизации учитываются один раз.
+    """
+    depths = {}
+    stack = [root]
+    while stack:
+        node = stack[-1]
+        if id(node) in depths:
+            stack.pop()
+            continue
+        children = _children(node)
+        pending = [child for child in children if id(child) not in depths]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        depths[id(node)] = 1 + max((depths[id(child)] for child in children), default=0)
+    return depths[id(root)], len(depths)
+
+
+class _PhaseTimer:
+    """Засекает время, прирост блоков памяти и (при trace_memory) пик памяти фазы."""
+    def __init__(self, stats, trace_memory):
+        self.stats = stats
+        self.trace_memory = trace_memory
+
+    def run(self, phase, function, *args):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        blocks = sys.getallocatedblocks()
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.stats.phases[phase] += time.perf_counter() - started
+            self.stats.allocated_blocks[phase] += sys.getallocatedblocks() - blocks
+            if self.trace_memory:
+                self.stats.peak_kib[phase] = (tracemalloc.get_traced_memory()[1] - memory_before) / 1024
+
+
+def translate_with_stats(text, optimize_passes=(), recover=False, trace_memory=False, backend='regex', workers=1):
+    """То же, что translator.translate, но с заполненным TranslationResult.stats."""
+    stats = TranslationStats()
+    if trace_memory:
+        stats.peak_kib = dict.fromkeys(PHASES, 0.0)
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+    timer = _PhaseTimer(stats, trace_memory)
+    try:
+        lexer = Lexer(text, backend)
+        stream, errors = timer.run('lex', lambda: lexer.tokenize_parallel(workers))
+        stats.token_counts = {TOKEN_TYPES[code]: count for code, count in Counter(stream.types).items()}
+        lexer_errors = errors
+
+        parser = InstrumentedParser(stream, text, optimize_passes, recover=recover)
+        symbol_table, errors = timer.run('parse', parser.parse)
+        # Ошибки лексера — как в translate: только до места остановки разбора
+        next_item = parser.peek_item()
+        lexer_errors = reached_lexer_errors(lexer_errors, None if next_item is None else next_item[1])
+        if lexer_errors:
+            return TranslationResult({}, lexer_errors, 'lexer', stats)
+        # Вычисление Окончания выполняется внутри разбора: выносим его в отдельную фазу
+        stats.phases['parse'] -= parser.evaluate_seconds
+        stats.phases['evaluate'] = parser.evaluate_seconds
+        stats.allocated_blocks['parse'] -= parser.evaluate_blocks
+        stats.allocated_blocks['evaluate'] = parser.evaluate_blocks
+        stats.peek_calls = parser.peek_calls
+        stats.consume_calls = parser.current_token_index
+        if parser.expression is not None:
+            stats.max_expression_depth, stats.expression_nodes = expression_shape(parser.expression)
+        if errors:
+            return TranslationResult({}, sorted(errors, key=lambda error: error[1]), 'parser', stats)
+
+        timer.run('format', lambda: [format_value(value) for value in symbol_table.values()])
+        return TranslationResult(symbol_table, [], None, stats)
+    finally:
+        if trace_memory and started_tracing:
+            tracemalloc.stop()
+
+
+def run_profiled(path, function, *args, **kwargs):
+    """Выполняет function(*args, **kwargs) под cProfile и сохраняет статистику в path."""
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
@@ -0,0 +1,148 @@
+"""
+Генератор синтетических программ по грамматике языка (bnf.txt) для бенчмарков.
+
+Все функции принимают генератор random.Random, поэтому при одном и том же зерне
+программы воспроизводимы. generate_valid строит корректную программу,
+generate_invalid — корректную программу с внесёнными ошибками из разных
+категорий (errors.txt).
+"""
+# Предельная глубина вложенности скобок по грамматике
+MAX_BRACKET_DEPTH = 2
+
+TARGET = 'lo001'
+
+
+def octal_int(rng, max_value=8 ** 6):
+    return format(rng.randrange(max_value), 'o')
+
+
+def octal_real(rng):
+    """вещ = цел "." цел."""
+    return f"{format(rng.randrange(64), 'o')}.{format(rng.randrange(1, 512), 'o')}"
+
+
+def octal_complex(rng):
+    """компл = вещ "," вещ (без пробелов)."""
+    return f"{octal_real(rng)},{octal_real(rng)}"
+
+
+def array_row(rng, length, complex_share=1 / 3):
+    """Строка блока Множ из length чисел; доля компл — complex_share, остальное поровну цел и вещ."""
+    numbers = []
+    for _ in range(length):
+        roll = rng.random()
+        if roll < complex_share:
+            numbers.append(octal_complex(rng))
+        elif roll < (1 + complex_share) / 2:
+            numbers.append(octal_int(rng))
+        else:
+            numbers.append(octal_real(rng))
+    return "Array " + " ".join(numbers)
+
+
+def expression_real(rng):
+    """вещ от 0.5 до 2: произведения и степени таких чисел не переполняют float."""
+    return f"{rng.randrange(2)}.{format(rng.randrange(0o400, 0o1000), 'o')}"
+
+
+def _operand(rng, depth, max_depth, bracket_share):
+    """блок3: вещ или выражение в скобках (не глубже max_depth)."""
+    if depth < max_depth and rng.random() < bracket_share:
+        return "[" + expression(rng, rng.randint(2, 4), depth + 1, max_depth, bracket_share) + "]"
+    return expression_real(rng)
+
+
+def expression(rng, terms, depth=0, max_depth=MAX_BRACKET_DEPTH, bracket_share=0.3):
+    """
+    прав. часть из terms операндов, соединённых "+", "-", "*", "/" и "**".
+    Степени короткие (не больше двух операндов подряд, показатель — вещ), а операнды лежат
+    между 0.5 и 2, поэтому выражение вычисляется без переполнения. Внутри скобок
+    нет "-": значение скобок положительно и не может оказаться нулевым делителем.
+    bracket_share — вероятность того, что операнд будет выражением в скобках.
+    """
+    operators = ('+', '-', '*', '/', '**') if depth == 0 else ('+', '*', '/', '**')
+    parts = [_operand(rng, depth, max_depth, bracket_share)]
+    previous_power = False
+    for _ in range(terms - 1):
+        operator = rng.choice(operators)
+        if operator == '**' and previous_power:
+            operator = '+'
+        previous_power = operator == '**'
+        parts.append(operator)
+        # Показатель степени — всегда вещ без скобок, иначе степени скобок переполняются
+        parts.append(expression_real(rng) if previous_power else _operand(rng, depth, max_depth, bracket_share))
+    return " ".join(parts)
+
+
+def generate_valid(rng, blocks=10, row_length=10, complex_share=1 / 3, terms=10,
+                   max_depth=MAX_BRACKET_DEPTH, bracket_share=0.3):
+    """
+    Корректная программа: blocks блоков Множ по row_length чисел и Окончание
+    из terms операндов.
+    """
+    terms = max(1, terms)
+    lines = ["Start"]
+    lines.extend(array_row(rng, row_length, complex_share) for _ in range(blocks))
+    lines.append(f"{TARGET} = {expression(rng, terms, 0, max_depth, bracket_share)}")
+    lines.append("End")
+    return "\n".join(lines)
+
+
+def _digit_positions(text):
+    start = text.index("Array")
+    end = text.index(TARGET)
+    return [index for index in range(start, end) if text[index].isdigit()]
+
+
+# Внесение ошибок разных категорий; каждая функция возвращает изменённый текст
+def _bad_octal_digit(rng, text):
+    positions = _digit_positions(text)
+    index = rng.choice(positions)
+    return text[:index] + rng.choice('89') + text[index + 1:]
+
+
+def _dangling_dot(rng, text):
+    index = text.index("Array") + len("Array")
+    return text[:index] + " 7." + text[index:]
+
+
+def _double_operator(rng, text):
+    index = text.index(" = ") + 3
+    return text[:index] + "1.0 + * " + text[index:]
+
+
+def _wrong_bracket(rng, text):
+    index = text.index(" = ") + 3
+    return text[:index] + "(1.0) + " + text[index:]
+
+
+def _integer_in_expression(rng, text):
+    index = text.index(" = ") + 3
+    return text[:index] + "7 + " + text[index:]
+
+
+def _too_deep(rng, text):
+    index = text.index(" = ") + 3
+    return text[:index] + "[[[1.0]]] + " + text[index:]
+
+
+def _missing_end(rng, text):
+    return text[:text.rindex("End")]
+
+
+MUTATIONS = (_bad_octal_digit, _dangling_dot, _double_operator, _wrong_bracket,
+             _integer_in_expression, _too_deep, _missing_end)
+
+
+def generate_invalid(rng, errors=5, **options):
+    """Программа generate_valid(**options) с errors внесёнными ошибками (повторяются только ошибки в числах)."""
+    text = generate_valid(rng, **options)
+    used = set()
+    for _ in range(errors):
+        mutation = rng.choice(MUTATIONS)
+        if mutation in used and mutation is not _bad_octal_digit:
+            mutation = _bad_octal_digit
+        used.add(mutation)
+        text = mutation(rng, text)
+    return text
+
@@ -0,0 +1,224 @@
+"""
+Постоянно работающий сервер трансляции по протоколу JSON-RPC 2.0.
+
+Запуск: python 3/server.py [--socket ПУТЬ] [--workers N]
+
+Без --socket запросы читаются из stdin, ответы пишутся в stdout; с --socket
+сервер слушает Unix-сокет (по соединению на клиента). Одна строка — одно
+сообщение JSON. Ответы на запросы одного соединения могут приходить не по
+порядку, их сопоставляют по id.
+
+Методы:
+  translate {"text": "...", "optimize": ["fold", ...], "recover": false} -> как TranslationResult.as_dict()
+  ping      {}                                         -> "pong"
+  stats     {}                                         -> счётчики кэша (при --workers 0)
+
+Запросы выполняются в пуле процессов, которые импортируют транслятор один раз
+при старте, поэтому скомпилированные шаблоны и кэши остаются «тёплыми».
+При --workers 0 запросы выполняются в самом сервере.
+Каждый процесс держит кэш результатов (cache.TranslationCache) на --cache-size
+записей; --cache-dir добавляет общий для всех процессов дисковый уровень.
+"""
+import argparse
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import DEFAULT_MAX_ENTRIES, TranslationCache
+from optimizer import OPTIMIZATION_PASSES
+
+JSONRPC_VERSION = '2.0'
+
+# Коды ошибок JSON-RPC 2.0
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+WARM_UP_PROGRAM = "Start Array 1 1.2,3.4\nlo001 = [1.0 + lo001] ** 2.0 / 3.0 End"
+
+
+# Кэш результатов текущего процесса (создаётся в _warm_up)
+_cache = None
+
+
+def _warm_up(cache_size=DEFAULT_MAX_ENTRIES, cache_dir=None):
+    """Инициализатор процессов пула: загружает модули и прогревает кэши."""
+    global _cache
+    _cache = TranslationCache(cache_size, cache_dir)
+    _cache.translate(WARM_UP_PROGRAM)
+
+
+def _translate_request(text, optimize_passes, recover=False):
+    return _cache.translate(text, optimize_passes, recover).as_dict()
+
+
+def _error_response(request_id, code, message):
+    return {'jsonrpc': JSONRPC_VERSION, 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+class TranslationServer:
+    """Разбирает сообщения JSON-RPC и выполняет их в пуле процессов."""
+    def __init__(self, workers=None, cache_size=DEFAULT_MAX_ENTRIES, cache_dir=None):
+        if workers == 0:
+            self.executor = None
+            _warm_up(cache_size, cache_dir)
+        else:
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_warm_up,
+                                                initargs=(cache_size, cache_dir))
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def handle_message(self, line, respond):
+        """
+        Обрабатывает одну строку запроса. respond(response) вызывается с готовым
+        ответом ровно один раз (возможно, из другого потока) и только если метод
+        вернул True; уведомления (запросы без id) ответа не получают.
+        """
+        try:
+            request = json.loads(line)
+        except ValueError as error:
+            respond(_error_response(None, PARSE_ERROR, f'Неверный JSON: {error}'))
+            return True
+
+        if not isinstance(request, dict) or request.get('jsonrpc') != JSONRPC_VERSION or not isinstance(request.get('method'), str):
+            respond(_error_response(request.get('id') if isinstance(request, dict) else None, INVALID_REQUEST, 'Неверный запрос JSON-RPC'))
+            return True
+
+        request_id = request.get('id')
+        is_notification = 'id' not in request
+
+        def reply(response):
+            if not is_notification:
+                respond(response)
+        self._dispatch(request, request_id, reply)
+        return not is_notification
+
+    def _dispatch(self, request, request_id, reply):
+        method = request['method']
+        params = request.get('params', {})
+        if method == 'ping':
+            reply({'jsonrpc': JSONRPC_VERSION, 'id': request_id, 'result': 'pong'})
+            return
+        if method == 'stats' and self.executor is None:
+            reply({'jsonrpc': JSONRPC_VERSION, 'id': request_id, 'result': _cache.stats()})
+            return
+        if method != 'translate':
+            reply(_error_response(request_id, METHOD_NOT_FOUND, f"Неизвестный метод '{method}'"))
+            return
+        if not isinstance(params, dict) or not isinstance(params.get('text'), str):
+            reply(_error_response(request_id, INVALID_PARAMS, 'Ожидался параметр "text" (строка)'))
+            return
+
+        optimize_passes = params.get('optimize', [])
+        if not isinstance(optimize_passes, list) or not all(name in OPTIMIZATION_PASSES for name in optimize_passes):
+            reply(_error_response(request_id, INVALID_PARAMS,
+                                  f'Параметр "optimize" — список проходов из: {", ".join(OPTIMIZATION_PASSES)}'))
+            return
+        optimize_passes = tuple(optimize_passes)
+        recover = bool(params.get('recover', False))
+        if self.executor is None:
+            self._complete(request_id, reply, lambda: _translate_request(params['text'], optimize_passes, recover))
+            return
+        future = self.executor.submit(_translate_request, params['text'], optimize_passes, recover)
+        future.add_done_callback(lambda done: self._complete(request_id, reply, done.result))
+
+    @staticmethod
+    def _complete(request_id, reply, get_result):
+        try:
+            result = get_result()
+        except Exception as error:
+            reply(_error_response(request_id, INTERNAL_ERROR, str(error)))
+        else:
+            reply({'jsonrpc': JSONRPC_VERSION, 'id': request_id, 'result': result})
+
+    def serve_stream(self, reader, writer):
+        """Обслуживает один поток строк (stdin/stdout или соединение сокета) до его закрытия."""
+        all_sent = threading.Condition()
+        pending = 0
+
+        def respond(response):
+            nonlocal pending
+            data = json.dumps(response, ensure_ascii=False) + '\n'
+            with all_sent:
+                try:
+                    writer.write(data)
+                    writer.flush()
+                except (OSError, ValueError):
+                    pass  # клиент отключился
+                pending -= 1
+                all_sent.notify_all()
+
+        for line in reader:
+            if not line.strip():
+                continue
+            with all_sent:
+                pending += 1
+            if not self.handle_message(line, respond):
+                with all_sent:
+                    pending -= 1
+
+        # Дожидаемся ответов на все запросы перед закрытием потока
+        with all_sent:
+            all_sent.wait_for(lambda: pending == 0)
+
+
+def serve_unix_socket(server, path):
+    """Принимает соединения на Unix-сокете, каждое обслуживается в своём потоке."""
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            reader = (line.decode('utf-8') for line in self.rfile)
+            writer = _SocketWriter(self.wfile)
+            server.serve_stream(reader, writer)
+
+    if os.path.exists(path):
+        os.unlink(path)
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as socket_server:
+        try:
+            socket_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+class _SocketWriter:
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, data):
+        self.wfile.write(data.encode('utf-8'))
+
+    def flush(self):
+        self.wfile.flush()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--socket', help='путь к Unix-сокету (по умолчанию stdin/stdout)')
+    arg_parser.add_argument('--workers', type=int, default=None, help='количество процессов (0 — без пула)')
+    arg_parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES, help='записей в кэше каждого процесса')
+    arg_parser.add_argument('--cache-dir', help='каталог дискового кэша, общего для процессов')
+    args = arg_parser.parse_args()
+
+    # SIGTERM завершает сервер так же, как Ctrl+C: с удалением сокета и остановкой пула
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    server = TranslationServer(args.workers, args.cache_size, args.cache_dir)
+    try:
+        if args.socket:
+            serve_unix_socket(server, args.socket)
+        else:
+            server.serve_stream(sys.stdin, sys.stdout)
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+Двоичные снимки результата трансляции для быстрой повторной загрузки.
+
+Снимок хранит поток токенов (коды типов и позиции), ошибки, таблицу символов,
+дерево выражения Окончания и колонки блоков Множ. Формат версионирован,
+записывается через struct/array (без pickle) и содержит SHA-256 исходного
+текста и версии транслятора: снимок от другого текста или другой версии кода
+отвергается (StaleSnapshotError) и перестраивается в load_or_build.
+
+Все секции выровнены по 8 байт, поэтому при загрузке колонки токенов и чисел
+отдаются как memoryview над буфером файла (mmap) без копирования; такие
+TokenStream и ArrayBlock доступны только для чтения.
+
+Раскладка: заголовок HEADER, затем секции по порядку — токены, ошибки лексера,
+ошибки парсера, переменные, имя цели, узлы выражения, блоки Множ.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from cache import translator_version
+from columns import ArrayBlock
+from expr import BinOp, Neg, Num, Var
+from lexer import Lexer, TokenStream
+from parser import Parser
+from translator import TranslationResult, reached_lexer_errors
+
+MAGIC = b'TRSN'
+FORMAT_VERSION = 1
+
+# magic, версия формата, порядок байт массивов, sha256 исходника, sha256 версии транслятора
+HEADER = struct.Struct('<4sHB1x32s32s')
+COUNT = struct.Struct('<Q')
+LENGTH = struct.Struct('<I')
+SPAN = struct.Struct('<qq')
+# вид значения (VALUE_*), действительная и мнимая части
+VALUE = struct.Struct('<B7xdd')
+# вид узла, оператор (для числа — VALUE_*), левый и правый потомки (номера узлов), начало, конец, op_start, значение (re, im)
+NODE = struct.Struct('<BB2xiiqqqdd4x')
+# начало, конец, количество чисел, количество компл
+BLOCK = struct.Struct('<qqQQ')
+
+BYTE_ORDERS = ('little', 'big')
+
+VALUE_FLOAT, VALUE_COMPLEX, VALUE_INT = range(3)
+NODE_NUM, NODE_VAR, NODE_NEG, NODE_BINOP = range(4)
+OPERATORS = ('+', '-', '*', '/', '**')
+
+
+class SnapshotError(Exception):
+    """Файл не является снимком поддерживаемой версии или повреждён."""
+
+
+class StaleSnapshotError(SnapshotError):
+    """Снимок построен для другого исходного текста или другой версии транслятора."""
+
+
+class Snapshot:
+    """Результат лексического и синтаксического анализа одной программы."""
+    __slots__ = ('tokens', 'lexer_errors', 'parser_errors', 'variables', 'target', 'expression', 'arrays')
+
+    def __init__(self, tokens, lexer_errors, parser_errors, variables, target, expression, arrays):
+        self.tokens = tokens
+        self.lexer_errors = lexer_errors
+        self.parser_errors = parser_errors
+        self.variables = variables
+        self.target = target
+        self.expression = expression
+        self.arrays = arrays
+
+    def result(self):
+        """TranslationResult, совпадающий с translator.translate()."""
+        if self.lexer_errors:
+            return TranslationResult({}, sorted(self.lexer_errors, key=lambda error: error[1]), 'lexer')
+        if self.parser_errors:
+            return TranslationResult({}, sorted(self.parser_errors, key=lambda error: error[1]), 'parser')
+        return TranslationResult(dict(self.variables), [])
+
+
+def source_digest(text):
+    data = text.encode('utf-8') if isinstance(text, str) else text
+    return hashlib.sha256(data).digest()
+
+
+def build_snapshot(text):
+    """Выполняет лексический и синтаксический анализ и возвращает Snapshot."""
+    tokens, lexer_errors = Lexer(text).tokenize_stream()
+    parser = Parser(tokens, text)
+    variables, parser_errors = parser.parse()
+    # Как в translate: только ошибки лексера до места остановки разбора
+    next_item = parser.peek_item()
+    lexer_errors = reached_lexer_errors(lexer_errors, None if next_item is None else next_item[1])
+    if lexer_errors:
+        return Snapshot(tokens, lexer_errors, [], {}, None, None, [])
+    return Snapshot(tokens, [], parser_errors, variables, parser.target, parser.expression, parser.arrays)
+
+
+# --- Запись ---
+
+class _Writer:
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def raw(self, data):
+        self.parts.append(data)
+        self.size += len(data)
+        padding = -self.size % 8
+        if padding:
+            self.parts.append(bytes(padding))
+            self.size += padding
+
+    def count(self, value):
+        self.raw(COUNT.pack(value))
+
+    def string(self, value):
+        data = value.encode('utf-8')
+        self.raw(LENGTH.pack(len(data)) + data)
+
+    def errors(self, errors):
+        self.count(len(errors))
+        for message, start, end in errors:
+            self.raw(SPAN.pack(start, end))
+            self.string(message)
+
+
+def _value_kind(value):
+    if isinstance(value, complex):
+        return VALUE_COMPLEX
+    return VALUE_INT if isinstance(value, int) else VALUE_FLOAT
+
+
+def _pack_value(value):
+    value_kind = _value_kind(value)
+    value = complex(value)
+    return VALUE.pack(value_kind, value.real, value.imag)
+
+
+def _unpack_value(value_kind, real, imag):
+    if value_kind == VALUE_COMPLEX:
+        return complex(real, imag)
+    return int(real) if value_kind == VALUE_INT else real
+
+
+def _pack_nodes(root):
+    """Узлы в обратном обходе; общие узлы DAG записываются один раз. Корень — последний."""
+    numbers = {}
+    records = []
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in numbers:
+            continue
+        children = (node.left, node.right) if isinstance(node, BinOp) else (node.operand,) if isinstance(node, Neg) else ()
+        if not expanded and children:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+        if isinstance(node, Num):
+            value = complex(node.value)
+            record = NODE.pack(NODE_NUM, _value_kind(node.value), -1, -1, node.start, node.end, 0, value.real, value.imag)
+        elif isinstance(node, Var):
+            record = NODE.pack(NODE_VAR, 0, node.slot, -1, node.start, node.end, 0, 0.0, 0.0)
+        elif isinstance(node, Neg):
+            record = NODE.pack(NODE_NEG, 0, numbers[id(node.operand)], -1, node.start, node.end, 0, 0.0, 0.0)
+        else:
+            record = NODE.pack(NODE_BINOP, OPERATORS.index(node.op), numbers[id(node.left)], numbers[id(node.right)],
+                               node.start, node.end, node.op_start, 0.0, 0.0)
+        numbers[id(node)] = len(records)
+        records.append(record)
+    return records
+
+
+def dump(snapshot, text):
+    """Сериализует снимок программы text в bytes."""
+    writer = _Writer()
+    writer.raw(HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDERS.index(sys.byteorder),
+                           source_digest(text), bytes.fromhex(translator_version())))
+
+    tokens = snapshot.tokens
+    writer.count(len(tokens))
+    writer.raw(bytes(tokens.types))
+    writer.raw(memoryview(tokens.starts).cast('B'))
+    writer.raw(memoryview(tokens.ends).cast('B'))
+
+    writer.errors(snapshot.lexer_errors)
+    writer.errors(snapshot.parser_errors)
+
+    writer.count(len(snapshot.variables))
+    for name, value in snapshot.variables.items():
+        writer.string(name)
+        writer.raw(_pack_value(value))
+
+    writer.string(snapshot.target or '')
+
+    records = _pack_nodes(snapshot.expression) if snapshot.expression is not None else []
+    writer.count(len(records))
+    writer.raw(b''.join(records))
+
+    # Блоки Множ: таблица блоков, затем общие колонки всех блоков подряд
+    blocks = snapshot.arrays
+    writer.count(len(blocks))
+    writer.raw(b''.join(BLOCK.pack(block.start, block.end, len(block), block.complex_count) for block in blocks))
+    writer.raw(b''.join(bytes(block.kinds) for block in blocks))
+    writer.raw(b''.join(memoryview(block.reals).cast('B') for block in blocks))
+    writer.raw(b''.join(memoryview(block.complexes).cast('B') for block in blocks))
+    return b''.join(writer.parts)
+
+
+def save(snapshot, text, path):
+    """Записывает снимок атомарно (временный файл и os.replace)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            output.write(dump(snapshot, text))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+# --- Чтение ---
+
+class _Reader:
+    def __init__(self, buffer, swap):
+        self.buffer = memoryview(buffer)
+        self.position = 0
+        self.swap = swap
+
+    def raw(self, size):
+        end = self.position + size
+        if end > len(self.buffer):
+            raise SnapshotError("Снимок обрезан")
+        view = self.buffer[self.position:end]
+        self.position = end + (-end % 8)
+        return view
+
+    def unpack(self, layout):
+        return layout.unpack(self.raw(layout.size))
+
+    def count(self):
+        return self.unpack(COUNT)[0]
+
+    def column(self, typecode, count):
+        """Колонка из count элементов: memoryview без копирования или array при другом порядке байт."""
+        view = self.raw(count * struct.calcsize(typecode)).cast(typecode)
+        if self.swap and typecode != 'B':
+            column = array(typecode, view)
+            column.byteswap()
+            return column
+        return view
+
+    def string(self):
+        length = LENGTH.unpack_from(self.buffer, self.position)[0]
+        return str(self.raw(LENGTH.size + length)[LENGTH.size:], 'utf-8')
+
+    def errors(self):
+        result = []
+        for _ in range(self.count()):
+            start, end = self.unpack(SPAN)
+            result.append((self.string(), start, end))
+        return result
+
+
+def _unpack_nodes(records, names):
+    nodes = []
+    for kind, op, left, right, start, end, op_start, real, imag in records:
+        if kind == NODE_NUM:
+            nodes.append(Num(_unpack_value(op, real, imag), start, end))
+        elif kind == NODE_VAR:
+            nodes.append(Var(names[left], start, end, left))
+        elif kind == NODE_NEG:
+            nodes.append(Neg(nodes[left], start, end))
+        else:
+            nodes.append(BinOp(OPERATORS[op], nodes[left], nodes[right], start, end, op_start))
+    return nodes[-1] if nodes else None
+
+
+def load(buffer, text):
+    """
+    Загружает снимок из буфера (bytes, mmap) для исходного текста text.
+    StaleSnapshotError — если снимок построен для другого текста или версии транслятора.
+    """
+    if len(buffer) < HEADER.size:
+        raise SnapshotError("Снимок обрезан")
+    magic, version, byte_order, digest, translator_digest = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != FORMAT_VERSION or byte_order >= len(BYTE_ORDERS):
+        raise SnapshotError("Неизвестный формат или версия снимка")
+    if digest != source_digest(text):
+        raise StaleSnapshotError("Исходный текст изменился")
+    if translator_digest != bytes.fromhex(translator_version()):
+        raise StaleSnapshotError("Снимок построен другой версией транслятора")
+
+    reader = _Reader(buffer, BYTE_ORDERS[byte_order] != sys.byteorder)
+    reader.raw(HEADER.size)
+    try:
+        tokens = TokenStream(text)
+        count = reader.count()
+        tokens.types = reader.column('B', count)
+        tokens.starts = reader.column('q', count)
+        tokens.ends = reader.column('q', count)
+
+        lexer_errors = reader.errors()
+        parser_errors = reader.errors()
+
+        variables = {}
+        for _ in range(reader.count()):
+            name = sys.intern(reader.string())
+            variables[name] = _unpack_value(*reader.unpack(VALUE))
+
+        target = reader.string() or None
+        node_count = reader.count()
+        records = NODE.iter_unpack(reader.raw(node_count * NODE.size))
+        expression = _unpack_nodes(records, list(variables))
+
+        block_count = reader.count()
+        table = list(BLOCK.iter_unpack(reader.raw(block_count * BLOCK.size)))
+        total = sum(count for _, _, count, _ in table)
+        total_complex = sum(complex_count for _, _, _, complex_count in table)
+        kinds = reader.column('B', total)
+        reals = reader.column('d', total - total_complex)
+        complexes = reader.column('d', 2 * total_complex)
+        arrays = []
+        kind_offset = real_offset = complex_offset = 0
+        for start, end, count, complex_count in table:
+            real_count = count - complex_count
+            arrays.append(ArrayBlock(start, end, kinds[kind_offset:kind_offset + count],
+                                     reals[real_offset:real_offset + real_count],
+                                     complexes[complex_offset:complex_offset + 2 * complex_count]))
+            kind_offset += count
+            real_offset += real_count
+            complex_offset += 2 * complex_count
+    except (struct.error, UnicodeDecodeError, IndexError, ValueError) as error:
+        raise SnapshotError(f"Снимок повреждён: {error}") from error
+
+    return Snapshot(tokens, lexer_errors, parser_errors, variables, target, expression, arrays)
+
+
+def load_file(path, text):
+    """Загружает снимок из файла через mmap (колонки ссылаются на отображение файла)."""
+    with open(path, 'rb') as source:
+        try:
+            buffer = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as error:  # пустой файл
+            raise SnapshotError("Снимок пуст") from error
+    return load(buffer, text)
+
+
+def load_or_build(path, text):
+    """
+    Возвращает (снимок, загружен_ли_из_файла). Отсутствующий, устаревший или
+    повреждённый снимок перестраивается и перезаписывается.
+    """
+    try:
+        return load_file(path, text), True
+    except (OSError, SnapshotError):
+        pass
+    snapshot = build_snapshot(text)
+    save(snapshot, text, path)
+    return snapshot, False
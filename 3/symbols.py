@@ -0,0 +1,42 @@
+"""Таблица символов с интернированными именами и целочисленными слотами."""
+import sys
+
+
+class SymbolTable:
+    """
+    Переменные хранятся в списке values по номеру слота. Имя разрешается в слот
+    один раз (при разборе), после чего чтение переменной — индексация списка.
+    Отображение имя -> значение строится по запросу методом as_dict().
+    """
+    __slots__ = ('names', 'slots', 'values')
+
+    def __init__(self):
+        self.names = []
+        self.slots = {}
+        self.values = []
+
+    def declare(self, name, value=0):
+        """Объявляет переменную (или переопределяет её значение) и возвращает её слот."""
+        name = sys.intern(name)
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = len(self.names)
+            self.slots[name] = slot
+            self.names.append(name)
+            self.values.append(value)
+        else:
+            self.values[slot] = value
+        return slot
+
+    def resolve(self, name):
+        """Возвращает слот объявленной переменной или None."""
+        return self.slots.get(name)
+
+    def __contains__(self, name):
+        return name in self.slots
+
+    def __len__(self):
+        return len(self.names)
+
+    def as_dict(self):
+        return dict(zip(self.names, self.values))
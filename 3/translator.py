@@ -0,0 +1,237 @@
+"""
+Трансляция без графического интерфейса: translate(text) -> TranslationResult.
+
+Запуск: python 3/translator.py [ФАЙЛ] [--json] [--all-errors] [--stats] [--table-parser] [--arrays]
+                               [--backend regex|table] [--workers N] [--profile ФАЙЛ] [--snapshot СНИМОК]
+Без ФАЙЛа (или с "-") программа читается из stdin. Код возврата 1 при ошибках.
+ФАЙЛ в кодировке ASCII отображается в память (lexer.map_source_file) и не копируется в строку.
+С --all-errors выводятся все синтаксические ошибки, а не только первая.
+С --backend выбирается реализация лексера (lexer.LEXER_BACKENDS), по умолчанию regex.
+С --workers N большой вход токенизируется по кускам в N процессах (0 — по числу ядер).
+С --table-parser разбор выполняет табличный LL(1)-парсер (llparser.LLParser).
+С --arrays выражение Окончания дополнительно вычисляется поэлементно по каждому
+блоку Множ (Parser.evaluate_arrays), результаты выводятся построчно по блокам.
+С --stats в stderr (или в поле "stats" JSON) выводится время фаз и счётчики,
+с --profile ФАЙЛ трансляция выполняется под cProfile и статистика сохраняется в ФАЙЛ.
+С --snapshot результат берётся из двоичного снимка (snapshot.py), если он
+построен для того же текста, иначе снимок перестраивается.
+
+Модуль не импортирует tkinter; лексер и парсер загружаются при первой трансляции.
+"""
+import sys
+
+
+class TranslationResult:
+    """
+    Результат трансляции. variables — значения переменных (числа), errors —
+    список (сообщение, начало, конец), отсортированный по позиции, stage —
+    этап, на котором найдены ошибки ('lexer' или 'parser'), или None.
+    stats — profiling.TranslationStats при translate(..., collect_stats=True), иначе None.
+    arrays — векторы поэлементного вычисления Окончания по блокам Множ при
+    translate(..., evaluate_arrays=True), иначе None.
+    """
+    __slots__ = ('variables', 'errors', 'stage', 'stats', 'arrays')
+
+    def __init__(self, variables, errors, stage=None, stats=None, arrays=None):
+        self.variables = variables
+        self.errors = errors
+        self.stage = stage
+        self.stats = stats
+        self.arrays = arrays
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def formatted_variables(self):
+        """Значения переменных в восьмеричной записи."""
+        from parser import format_value
+        return {name: format_value(value) for name, value in self.variables.items()}
+
+    def formatted_arrays(self):
+        """Векторы блоков Множ в восьмеричной записи (список списков строк)."""
+        from octal import encode_many
+        return [encode_many(values) for values in self.arrays or ()]
+
+    def as_dict(self):
+        result = {
+            'ok': self.ok,
+            'stage': self.stage,
+            'variables': self.formatted_variables(),
+            'errors': [{'message': message, 'start': start, 'end': end} for message, start, end in self.errors],
+        }
+        if self.stats is not None:
+            result['stats'] = self.stats.as_dict()
+        if self.arrays is not None:
+            result['arrays'] = self.formatted_arrays()
+        return result
+
+    def __repr__(self):
+        return f"TranslationResult(variables={self.variables!r}, errors={self.errors!r})"
+
+
+def reached_lexer_errors(errors, stop):
+    """
+    Ошибки лексера до позиции stop — начала первого токена, который разбор не
+    поглотил (None — поглощены все токены), отсортированные по позиции. Лексер
+    останавливается вместе с разбором, поэтому ошибки дальше stop не сообщаются.
+    """
+    return sorted((error for error in errors if stop is None or error[1] < stop), key=lambda error: error[1])
+
+
+def translate(text, optimize_passes=(), recover=False, collect_stats=False, table_parser=False,
+              evaluate_arrays=False, backend='regex', workers=1):
+    """
+    Лексический и синтаксический анализ программы с вычислением Окончания.
+    backend — реализация лексера ('regex' или 'table', см. lexer.Lexer).
+    recover=True собирает все синтаксические ошибки за один проход (см. Parser).
+    collect_stats=True заполняет result.stats временем фаз и счётчиками (см. profiling).
+    table_parser=True разбирает табличным LL(1)-парсером из grammar.bnf (см. llparser);
+    он работает только в режиме до первой ошибки и без сбора статистики.
+    evaluate_arrays=True заполняет result.arrays поэлементным вычислением Окончания
+    по блокам Множ (см. Parser.evaluate_arrays); несовместимо с collect_stats.
+    Парсер читает токены по ходу лексического анализа: после фатальной ошибки
+    разбора остаток текста не токенизируется, а ошибки лексера сообщаются только
+    найденные до места остановки (см. reached_lexer_errors).
+    workers != 1 (None — по числу ядер) сначала токенизирует весь вход по кускам
+    в пуле процессов (Lexer.tokenize_parallel); вход меньше куска и одно ядро
+    обходятся без пула и читаются потоком, как при workers=1.
+    """
+    if optimize_passes:
+        from optimizer import check_passes
+        optimize_passes = check_passes(optimize_passes)
+    if table_parser and (recover or collect_stats):
+        raise ValueError("table_parser несовместим с recover и collect_stats")
+    if evaluate_arrays and collect_stats:
+        raise ValueError("evaluate_arrays несовместим с collect_stats")
+    if collect_stats:
+        from profiling import translate_with_stats
+        return translate_with_stats(text, optimize_passes, recover, backend=backend, workers=workers)
+    from lexer import Lexer
+
+    lexer = Lexer(text, backend)
+    if lexer.parallel_chunks(workers) is None:
+        tokens = lexer.iter_codes()
+    else:
+        tokens, _ = lexer.tokenize_parallel(workers)
+    if table_parser:
+        from llparser import LLParser
+        parser = LLParser(tokens, text, optimize_passes)
+    else:
+        from parser import Parser
+        parser = Parser(tokens, text, optimize_passes, recover=recover)
+    symbol_table, errors = parser.parse()
+    next_item = parser.peek_item()
+    lexer_errors = reached_lexer_errors(lexer.errors, None if next_item is None else next_item[1])
+    if lexer_errors:
+        return TranslationResult({}, lexer_errors, 'lexer')
+    arrays = parser.evaluate_arrays() if evaluate_arrays else None
+    if errors:
+        return TranslationResult({}, sorted(errors, key=lambda error: error[1]), 'parser')
+    return TranslationResult(symbol_table, [], arrays=arrays)
+
+
+def read_source(path, resources, mapped=False):
+    """
+    Текст программы из файла path ("-" — stdin). mapped=True отображает файл в память
+    (lexer.map_source_file, закрывается вместе с resources) вместо чтения в строку;
+    файл с не-ASCII символами или CR читается строкой, чтобы позиции ошибок
+    оставались в символах текста с переводами строк, приведёнными к LF.
+    """
+    if path == '-':
+        return sys.stdin.read()
+    if mapped:
+        import re
+        from lexer import map_source_file
+        buffer = resources.enter_context(map_source_file(path))
+        if not re.search(rb'[\x80-\xff\r]', buffer):
+            return buffer
+    with open(path, encoding='utf-8') as source:
+        return source.read()
+
+
+USAGE = ("usage: translator.py [ФАЙЛ] [--json] [--all-errors] [--stats] [--table-parser] [--arrays] "
+         "[--backend regex|table] [--workers N] [--profile ФАЙЛ] [--snapshot СНИМОК]")
+
+
+def main(argv=None):
+    # Аргументы разбираются вручную: импорт argparse заметно удлиняет холодный старт
+    argv = list(sys.argv[1:] if argv is None else argv)
+    options = {}
+    for option in ('--snapshot', '--profile', '--backend', '--workers'):
+        if option in argv:
+            index = argv.index(option)
+            if index + 1 >= len(argv):
+                print(USAGE, file=sys.stderr)
+                return 2
+            options[option] = argv.pop(index + 1)
+            del argv[index]
+    snapshot_path = options.get('--snapshot')
+    profile_path = options.get('--profile')
+    backend = options.get('--backend', 'regex')
+    if backend not in ('regex', 'table'):
+        print(USAGE, file=sys.stderr)
+        return 2
+    workers = options.get('--workers', '1')
+    if not workers.isdigit():
+        print(USAGE, file=sys.stderr)
+        return 2
+    workers = int(workers) or None
+    as_json = '--json' in argv
+    recover = '--all-errors' in argv
+    collect_stats = '--stats' in argv
+    table_parser = '--table-parser' in argv
+    evaluate_arrays = '--arrays' in argv
+    flags = ('--json', '--all-errors', '--stats', '--table-parser', '--arrays')
+    paths = [arg for arg in argv if arg not in flags]
+    if len(paths) > 1 or any(arg.startswith('--') for arg in paths):
+        print(USAGE, file=sys.stderr)
+        return 2
+    path = paths[0] if paths else '-'
+
+    if snapshot_path is not None and (recover or collect_stats or profile_path or table_parser or evaluate_arrays
+                                      or '--backend' in options or '--workers' in options):
+        print("--snapshot несовместим с --all-errors, --stats, --table-parser, --arrays, --backend, --workers "
+              "и --profile", file=sys.stderr)
+        return 2
+    if table_parser and (recover or collect_stats):
+        print("--table-parser несовместим с --all-errors и --stats", file=sys.stderr)
+        return 2
+    if evaluate_arrays and collect_stats:
+        print("--arrays несовместим с --stats", file=sys.stderr)
+        return 2
+
+    from contextlib import ExitStack
+    with ExitStack() as resources:
+        # Снимок и бэкенд 'table' работают со строкой, остальное — с отображённым файлом
+        text = read_source(path, resources, mapped=snapshot_path is None and backend == 'regex')
+        if snapshot_path is not None:
+            from snapshot import load_or_build
+            result = load_or_build(snapshot_path, text)[0].result()
+        elif profile_path is not None:
+            from profiling import run_profiled
+            result = run_profiled(profile_path, translate, text, recover=recover, collect_stats=collect_stats,
+                                  table_parser=table_parser, evaluate_arrays=evaluate_arrays, backend=backend,
+                                  workers=workers)
+        else:
+            result = translate(text, recover=recover, collect_stats=collect_stats, table_parser=table_parser,
+                               evaluate_arrays=evaluate_arrays, backend=backend, workers=workers)
+        if collect_stats and not as_json:
+            print(result.stats.format(), file=sys.stderr)
+        if as_json:
+            import json
+            print(json.dumps(result.as_dict(), ensure_ascii=False))
+        elif result.ok:
+            for name, value in result.formatted_variables().items():
+                print(f"{name} = {value}")
+            for number, values in enumerate(result.formatted_arrays(), 1):
+                print(f"Множ {number}: {' '.join(values)}")
+        else:
+            from lineindex import line_index
+            index = line_index(text)
+            for message, start, end in result.errors:
+                print(f"{path}:{index.location(start)}: {message}", file=sys.stderr)
+    return 0 if result.ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
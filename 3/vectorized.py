@@ -0,0 +1,206 @@
+"""
+Поэлементное вычисление выражения блока Окончание над данными блоков Множ.
+
+Переменные окружения могут быть векторами (колонками columns.ArrayBlock):
+каждая операция дерева выполняется один раз над всем вектором. С NumPy это
+один проход NumPy на узел, без него — map по элементам с той же семантикой,
+что и у скалярного compile_expression.
+
+Деление на ноль и арифметические ошибки возведения в степень (0 в отрицательной
+степени, переполнение) не прерывают вычисление: элемент получает nan, а номера
+всех таких элементов собираются и сообщаются одной ошибкой VectorEvaluationError.
+"""
+import operator
+from array import array
+from itertools import repeat
+
+from columns import get_numpy
+from expr import EvaluationError, Neg, Num, Var, postorder
+
+numpy = get_numpy()
+
+NAN = float('nan')
+
+# Сколько номеров элементов перечислять в сообщении об ошибке
+MAX_LISTED_INDEXES = 10
+
+_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '**': operator.pow,
+}
+
+
+DIVISION_BY_ZERO = 'деление на ноль'
+OVERFLOW = 'переполнение'
+
+
+class VectorEvaluationError(EvaluationError):
+    """
+    Деление на ноль или переполнение в части элементов. indexes — отсортированные
+    номера элементов, values — результат, в котором эти элементы равны nan.
+    """
+    def __init__(self, message, start, end, indexes, values):
+        super().__init__(message, start, end)
+        self.indexes = indexes
+        self.values = values
+
+
+def is_vector(value):
+    if numpy is not None:
+        return isinstance(value, numpy.ndarray)
+    return isinstance(value, (list, array))
+
+
+def evaluate_vectorized(node, env, length):
+    """
+    Вычисляет дерево (или DAG) над окружением env, где значения переменных —
+    числа или векторы длины length. Возвращает вектор длины length.
+    """
+    evaluator = _Evaluator(env, length)
+    values = evaluator.broadcast(evaluator.evaluate(node))
+    if evaluator.first_failure is not None:
+        indexes = numpy.flatnonzero(evaluator.failed) if numpy is not None else sorted(evaluator.failed)
+        listed = ', '.join(str(int(index)) for index in indexes[:MAX_LISTED_INDEXES])
+        if len(indexes) > MAX_LISTED_INDEXES:
+            listed += f', ... (всего {len(indexes)})'
+        start, end, reason = evaluator.first_failure
+        raise VectorEvaluationError(f'Ошибка: {reason} в элементах {listed}', start, end, indexes, values)
+    return values
+
+
+class _Evaluator:
+    def __init__(self, env, length):
+        if numpy is not None:
+            env = [numpy.asarray(value) if isinstance(value, (list, array)) else value for value in env]
+        self.env = env
+        self.length = length
+        self.memo = {}
+        # Элементы с ошибкой вычисления: булева маска NumPy или множество номеров
+        self.failed = numpy.zeros(length, dtype=bool) if numpy is not None else set()
+        self.first_failure = None
+
+    def broadcast(self, value):
+        if is_vector(value):
+            return value
+        if numpy is not None:
+            return numpy.full(self.length, value)
+        return [value] * self.length
+
+    def evaluate(self, root):
+        """Вычисляет узлы в порядке postorder без рекурсии; общий узел DAG — один раз."""
+        memo = self.memo
+        for node in postorder(root):
+            memo[id(node)] = self._evaluate(node)
+        return memo[id(root)]
+
+    def _evaluate(self, node):
+        if isinstance(node, Num):
+            return node.value
+        if isinstance(node, Var):
+            return self.env[node.slot]
+        if isinstance(node, Neg):
+            operand = self.memo[id(node.operand)]
+            if is_vector(operand) and numpy is None:
+                return list(map(operator.neg, operand))
+            return -operand
+
+        left = self.memo[id(node.left)]
+        right = self.memo[id(node.right)]
+        if node.op == '/':
+            return self._divide(node, left, right)
+        function = _OPERATORS[node.op]
+        if not is_vector(left) and not is_vector(right):
+            try:
+                return function(left, right)
+            except ArithmeticError as error:
+                # Ошибка в скалярной части выражения — во всех элементах
+                self._fail_all(node, _reason(error))
+                return NAN
+        if numpy is not None:
+            if node.op == '**':
+                return self._numpy_power(node, left, right)
+            return function(left, right)
+        try:
+            return list(map(function, self._iterate(left), self._iterate(right)))
+        except ArithmeticError:
+            pass
+        # Только ** бросает исключения: повторяем поэлементно, отмечая ошибочные элементы
+        result = []
+        for index, (base, exponent) in enumerate(zip(self._iterate(left), self._iterate(right))):
+            try:
+                result.append(function(base, exponent))
+            except ArithmeticError as error:
+                self._fail(node, _reason(error))
+                self.failed.add(index)
+                result.append(NAN)
+        return result
+
+    def _iterate(self, value):
+        return value if is_vector(value) else repeat(value, self.length)
+
+    def _fail(self, node, reason=DIVISION_BY_ZERO):
+        if self.first_failure is None:
+            self.first_failure = (node.op_start, node.end, reason)
+
+    def _fail_all(self, node, reason=DIVISION_BY_ZERO):
+        self._fail(node, reason)
+        if numpy is not None:
+            self.failed[:] = True
+        else:
+            self.failed.update(range(self.length))
+
+    def _divide(self, node, left, right):
+        if not is_vector(right):
+            if right != 0:
+                if is_vector(left) and numpy is None:
+                    return [value / right for value in left]
+                return left / right
+            # Скалярный ноль в делителе — ошибка во всех элементах
+            self._fail_all(node)
+            return NAN
+
+        if numpy is not None:
+            zero = right == 0
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                result = numpy.asarray(left / right)
+            if zero.any():
+                self._fail(node)
+                self.failed |= zero
+                result = numpy.where(zero, NAN, result)
+            return result
+
+        result = []
+        for index, (dividend, divisor) in enumerate(zip(self._iterate(left), right)):
+            if divisor == 0:
+                self._fail(node)
+                self.failed.add(index)
+                result.append(NAN)
+            else:
+                result.append(dividend / divisor)
+        return result
+
+    def _numpy_power(self, node, left, right):
+        """
+        Степень как у float ** float: отрицательное основание с дробным показателем
+        даёт complex. Там, где Python бросил бы исключение (0 в отрицательной степени,
+        переполнение), NumPy даёт inf или nan: такие элементы отмечаются ошибкой.
+        """
+        with numpy.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result = numpy.power(left, right)
+            if not numpy.iscomplexobj(result):
+                invalid = numpy.isnan(result) & ~numpy.isnan(left) & ~numpy.isnan(right)
+                if invalid.any():
+                    result = numpy.power(numpy.asarray(left, dtype=numpy.complex128), right)
+        bad = ~numpy.isfinite(result) & numpy.isfinite(left) & numpy.isfinite(right)
+        if bad.any():
+            zero_base = bad & (numpy.asarray(left) == 0)
+            self._fail(node, DIVISION_BY_ZERO if zero_base.any() else OVERFLOW)
+            self.failed |= numpy.broadcast_to(bad, (self.length,))
+            result = numpy.where(bad, NAN, result)
+        return result
+
+
+def _reason(error):
+    return DIVISION_BY_ZERO if isinstance(error, ZeroDivisionError) else OVERFLOW